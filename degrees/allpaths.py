@@ -0,0 +1,189 @@
+"""
+Every shortest connection between two people in the degrees graph.
+
+A breadth-first search from the source labels people with their
+distance from it, stopping at the target's level. Walking back from the
+target through people one level closer each time picks out the layered
+graph of steps lying on some shortest path. The number of paths through
+it is counted level by level without listing them, and paths are then
+generated one at a time by a depth-first walk, so even millions of
+paths take memory proportional to a single path.
+
+Usage: python allpaths.py directory source target [paths]
+"""
+
+import sys
+from itertools import islice
+
+import degrees
+
+
+class ShortestPaths():
+    def __init__(self, graph, source, target):
+        self.graph = graph
+        self.source = source
+        self.target = target
+
+        # Maps each person on a shortest path to the (movie, person)
+        # steps that continue one of them, and to the number of shortest
+        # paths from the source that reach them
+        self.successors = {}
+        self.counts = {}
+        self.length = None
+
+        levels = distances_to(graph, source, target)
+        if target not in levels:
+            return
+        self.length = levels[target]
+
+        # Layers of people on shortest paths, from the target back to the source
+        predecessors = {}
+        layer = [target]
+        layers = [layer]
+        for level in range(self.length, 0, -1):
+            previous_layer = []
+            for person in layer:
+                steps = []
+                for movie in graph.movies_of(person):
+                    for neighbor in graph.stars_of(movie):
+                        if levels.get(neighbor) == level - 1:
+                            steps.append((movie, neighbor))
+                            if neighbor not in predecessors:
+                                predecessors[neighbor] = []
+                                previous_layer.append(neighbor)
+                predecessors[person] = steps
+            layer = previous_layer
+            layers.append(layer)
+
+        self.counts[source] = 1
+        for layer in reversed(layers[:-1]):
+            for person in layer:
+                self.counts[person] = 0
+                for movie, neighbor in predecessors[person]:
+                    self.counts[person] += self.counts[neighbor]
+                    self.successors.setdefault(neighbor, []).append((movie, person))
+
+    def count(self):
+        """
+        Returns the number of distinct shortest paths, counting each
+        movie shared by two people on them as a different path.
+        """
+        return self.counts.get(self.target, 0)
+
+    def paths(self, order=None):
+        """
+        Generates each shortest path as a list of (movie, person) index
+        pairs, like csr.shortest_path.
+
+        With order="year", each step from the source takes the most
+        recent movie first, so paths through recent movies come out
+        early; otherwise steps are taken by movie and person index.
+        """
+        if self.length is None:
+            return
+        if self.source == self.target:
+            yield []
+            return
+        successors = {}
+        for person, steps in self.successors.items():
+            steps = sorted(steps)
+            if order == "year":
+                steps.sort(key=lambda step: self.graph.movie_years[step[0]], reverse=True)
+            elif order is not None:
+                raise ValueError(f"Unknown path order '{order}'.")
+            successors[person] = steps
+
+        path = []
+        stack = [iter(successors[self.source])]
+        while stack:
+            step = next(stack[-1], None)
+            if step is None:
+                stack.pop()
+                if path:
+                    path.pop()
+                continue
+            path.append(step)
+            if step[1] == self.target:
+                yield list(path)
+                path.pop()
+            else:
+                stack.append(iter(successors[step[1]]))
+
+
+def all_shortest_paths(source_id, target_id, order=None):
+    """
+    Returns the number of shortest paths between two people on the graph
+    loaded by degrees.load_data, and a generator of those paths as lists
+    of (movie_id, person_id) pairs.
+    """
+    graph = degrees.csr_graph
+    shortest = ShortestPaths(graph, graph.person_index(source_id), graph.person_index(target_id))
+    paths = (
+        [(graph.movie_ids[movie], graph.person_ids[person]) for movie, person in path]
+        for path in shortest.paths(order)
+    )
+    return shortest.count(), paths
+
+
+def distances_to(graph, source, target):
+    """
+    Returns a dict of the distance from the source to every person
+    found by a breadth-first search that stops after reaching the target.
+    """
+    levels = {source: 0}
+    if graph.component(source) != graph.component(target):
+        return levels
+    seen_movies = bytearray(len(graph.movie_ids))
+    frontier = [source]
+    level = 0
+    while frontier and target not in levels:
+        level += 1
+        next_frontier = []
+        for person in frontier:
+            for movie in graph.movies_of(person):
+                if seen_movies[movie]:
+                    continue
+                seen_movies[movie] = 1
+                for neighbor in graph.stars_of(movie):
+                    if neighbor not in levels:
+                        levels[neighbor] = level
+                        next_frontier.append(neighbor)
+        frontier = next_frontier
+    return levels
+
+
+def main():
+    if len(sys.argv) not in [4, 5]:
+        sys.exit("Usage: python allpaths.py directory source target [paths]")
+    directory = sys.argv[1]
+    shown = int(sys.argv[4]) if len(sys.argv) == 5 else 10
+
+    print("Loading data...")
+    degrees.load_data(directory)
+    print("Data loaded.")
+
+    source = degrees.person_id_for_name(sys.argv[2])
+    if source is None:
+        sys.exit("Person not found.")
+    target = degrees.person_id_for_name(sys.argv[3])
+    if target is None:
+        sys.exit("Person not found.")
+
+    count, paths = all_shortest_paths(source, target, order="year")
+    if count == 0:
+        print("Not connected.")
+        return
+    print(f"{count} shortest paths. Most recent first:")
+    for number, path in enumerate(islice(paths, shown), start=1):
+        print(f"{number}:")
+        person_id = source
+        for movie_id, next_id in path:
+            person1 = degrees.people[person_id]["name"]
+            person2 = degrees.people[next_id]["name"]
+            movie = degrees.movies[movie_id]
+            print(f"  {person1} and {person2} starred in {movie['title']} ({movie['year']})")
+            person_id = next_id
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import random
+import unittest
+
+import csr
+from allpaths import ShortestPaths
+from csr_tests import graph_from_rows, random_rows
+
+
+def brute_force(graph, source, target):
+    """
+    Returns every shortest (movie, person) path from source to target,
+    found by trying every walk that gets one step closer to the target.
+    """
+    distances = {target: 0}
+    frontier = [target]
+    while frontier:
+        next_frontier = []
+        for person in frontier:
+            for movie in graph.movies_of(person):
+                for neighbor in graph.stars_of(movie):
+                    if neighbor not in distances:
+                        distances[neighbor] = distances[person] + 1
+                        next_frontier.append(neighbor)
+        frontier = next_frontier
+    if source not in distances:
+        return []
+
+    def walks(person):
+        if person == target:
+            return [[]]
+        return [[(movie, neighbor)] + walk
+                for movie in graph.movies_of(person)
+                for neighbor in graph.stars_of(movie)
+                if distances.get(neighbor) == distances[person] - 1
+                for walk in walks(neighbor)]
+    return walks(source)
+
+
+class TestShortestPaths(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = graph_from_rows(*random_rows(people=150, movies=60, stars=450))
+
+    def test_count_matches_paths(self):
+        rng = random.Random(0)
+        people = range(len(self.graph.person_ids))
+        for _ in range(200):
+            source, target = rng.choice(people), rng.choice(people)
+            shortest = ShortestPaths(self.graph, source, target)
+            paths = list(shortest.paths())
+            self.assertEqual(shortest.count(), len(paths))
+            self.assertEqual(sorted(brute_force(self.graph, source, target)), sorted(paths))
+            self.assertEqual(sorted(paths), sorted(shortest.paths(order="year")))
+            path = csr.search(self.graph, source, target)
+            self.assertEqual(path is None, shortest.count() == 0)
+
+    def test_same_person(self):
+        shortest = ShortestPaths(self.graph, 0, 0)
+        self.assertEqual(1, shortest.count())
+        self.assertEqual([[]], list(shortest.paths()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,188 @@
+"""
+Answer many degrees-of-separation queries in one run.
+
+Reads a CSV file of (source, target) pairs, each a person's name or
+IMDB id, and writes one JSON object per query to standard output, in
+input order. Queries are grouped by source so that one breadth-first
+search answers every target of a source. With --workers, groups are
+shared out across a pool of processes that inherit the loaded graph
+(or memory-map the same snapshot) rather than receiving it per task.
+
+Each path is a shortest path, as long as the one degrees.shortest_path
+finds, but where there are several it may not be the same one. The
+output does not depend on the number of workers. A line without both
+a source and a target is reported as an error for that query.
+
+Usage: python batch.py [--ambiguity POLICY] [--workers N] directory queries
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import sys
+from itertools import chain
+
+import csr
+import degrees
+
+
+def read_queries(path):
+    """
+    Returns the queries in a CSV file, as tuples that should be
+    (source, target) pairs, skipping blank lines and a `source,target`
+    header row.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        queries = [tuple(value.strip() for value in row) for row in csv.reader(f) if row]
+    if queries and tuple(value.lower() for value in queries[0]) == ("source", "target"):
+        queries = queries[1:]
+    return queries
+
+
+def resolve(value, ambiguity):
+    """
+    Returns the person_id for an IMDB id or a name, or None if unknown.
+    """
+    if value in degrees.people:
+        return value
+    return degrees.person_id_for_name(value, ambiguity)
+
+
+def group_queries(queries, ambiguity):
+    """
+    Resolves every query, returning the results for queries that could
+    not be resolved, and a dict mapping each source index to the
+    (query number, target index) pairs it has to answer.
+    """
+    graph = degrees.csr_graph
+    failures, groups = {}, {}
+    for number, query in enumerate(queries):
+        if len(query) != 2:
+            failures[number] = result(query, error="Expected a source and a target.")
+            continue
+        source, target = query
+        try:
+            source_id = resolve(source, ambiguity)
+            target_id = resolve(target, ambiguity)
+        except ValueError as error:
+            failures[number] = result((source, target), error=str(error))
+            continue
+        if source_id is None or target_id is None:
+            failures[number] = result((source, target), error="Person not found.")
+            continue
+        groups.setdefault(graph.person_index(source_id), []).append(
+            (number, graph.person_index(target_id))
+        )
+    return failures, groups
+
+
+def answer_group(queries, source, group):
+    """
+    Runs one search from `source`, returning (query number, result)
+    pairs for every target in `group`. Paths are read off one
+    breadth-first tree, so where there are several shortest paths the
+    one given may differ from degrees.shortest_path's.
+
+    `queries` maps each query number in `group` to its (source, target) input.
+    """
+    graph = degrees.csr_graph
+    paths = csr.paths_from(graph, source, [target for _, target in group])
+    source_id = graph.person_ids[source]
+    answers = []
+    for number, target in group:
+        path = paths[target]
+        if path is not None:
+            path = [(graph.movie_ids[movie], graph.person_ids[person]) for movie, person in path]
+        answers.append((number, result(queries[number], source_id, graph.person_ids[target], path)))
+    return answers
+
+
+def result(query, source_id=None, target_id=None, path=None, error=None):
+    """
+    Returns the JSON-serialisable result for one query.
+    """
+    if error is not None:
+        return {"query": query, "error": error}
+    return {
+        "query": query,
+        "source": source_id,
+        "target": target_id,
+        "degrees": None if path is None else len(path),
+        "path": path,
+    }
+
+
+def emit_in_order(answers, count, output):
+    """
+    Writes results as JSON lines in query order, as soon as every
+    earlier query has been answered.
+    """
+    pending, next_number = {}, 0
+    for number, answer in answers:
+        pending[number] = answer
+        while next_number in pending:
+            output.write(json.dumps(pending.pop(next_number)) + "\n")
+            next_number += 1
+    if next_number != count:
+        raise RuntimeError(f"Only {next_number} of {count} queries were answered.")
+
+
+def init_worker(directory, use_landmarks=False):
+    """
+    Loads the graph in a worker process, unless it was inherited by fork.
+    """
+    if degrees.csr_graph is None:
+        degrees.load_data(directory, use_landmarks)
+
+
+def answer_task(task):
+    return answer_group(*task)
+
+
+def run(queries, ambiguity, output, workers=1, directory=None):
+    """
+    Answers every query, writing results to `output`. Each answer has
+    the same number of degrees as degrees.shortest_path gives, and the
+    output is the same for any number of workers.
+
+    With more than one worker, searches run in a process pool; workers
+    that were not forked from this process load `directory` themselves.
+    """
+    failures, groups = group_queries(queries, ambiguity)
+    tasks = [
+        ({number: queries[number] for number, _ in group}, source, group)
+        for source, group in groups.items()
+    ]
+
+    if workers <= 1:
+        answers = chain.from_iterable(answer_task(task) for task in tasks)
+        emit_in_order(chain(failures.items(), answers), len(queries), output)
+        return
+
+    method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+    context = multiprocessing.get_context(method)
+    with context.Pool(workers, initializer=init_worker, initargs=(directory,)) as pool:
+        answers = chain.from_iterable(pool.imap_unordered(answer_task, tasks))
+        emit_in_order(chain(failures.items(), answers), len(queries), output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer degrees queries in bulk.")
+    parser.add_argument("--ambiguity", choices=["first", "skip", "error"], default="first",
+                        help="how to resolve a name shared by several people")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of processes to search with")
+    parser.add_argument("directory")
+    parser.add_argument("queries")
+    args = parser.parse_args()
+
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(args.directory)
+    print("Data loaded.", file=sys.stderr)
+
+    run(read_queries(args.queries), args.ambiguity, sys.stdout, args.workers, args.directory)
+
+
+if __name__ == "__main__":
+    main()
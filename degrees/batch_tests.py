@@ -0,0 +1,78 @@
+import csv
+import io
+import json
+import os
+import random
+import tempfile
+import unittest
+
+import batch
+import degrees
+
+
+def write_dataset(directory, people=300, movies=120, stars=600, seed=0):
+    """
+    Writes a random dataset of CSV files to `directory`, with a few
+    people in no movies.
+    """
+    rng = random.Random(seed)
+    with open(os.path.join(directory, "people.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for i in range(people):
+            writer.writerow([str(100 + i), f"Person {i}", ""])
+    with open(os.path.join(directory, "movies.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "year"])
+        for i in range(movies):
+            writer.writerow([str(5000 + i), f"Movie {i}", "2000"])
+    with open(os.path.join(directory, "stars.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        for _ in range(stars):
+            writer.writerow([str(100 + rng.randrange(people - 10)), str(5000 + rng.randrange(movies))])
+
+
+class TestBatch(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        write_dataset(cls.directory.name)
+        degrees.load_data(cls.directory.name)
+        rng = random.Random(1)
+        person_ids = sorted(degrees.people)
+        cls.queries = [(rng.choice(person_ids), rng.choice(person_ids)) for _ in range(200)]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def run_batch(self, queries, workers=1):
+        output = io.StringIO()
+        batch.run(queries, "first", output, workers, self.directory.name)
+        return [json.loads(line) for line in output.getvalue().splitlines()]
+
+    def test_lengths_match_shortest_path(self):
+        for (source, target), answer in zip(self.queries, self.run_batch(self.queries)):
+            expected = degrees.shortest_path(source, target)
+            self.assertEqual(None if expected is None else len(expected), answer["degrees"])
+            if answer["path"] is not None:
+                person_id = source
+                for movie_id, next_person_id in answer["path"]:
+                    self.assertIn(person_id, degrees.movies[movie_id]["stars"])
+                    self.assertIn(next_person_id, degrees.movies[movie_id]["stars"])
+                    person_id = next_person_id
+                self.assertEqual(target, person_id)
+
+    def test_workers_match_serial(self):
+        self.assertEqual(self.run_batch(self.queries), self.run_batch(self.queries, workers=2))
+
+    def test_malformed_line(self):
+        answers = self.run_batch([("Person 1",), ("100", "101")])
+        self.assertEqual("Expected a source and a target.", answers[0]["error"])
+        self.assertEqual("100", answers[1]["source"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,306 @@
+"""
+Benchmarks for the degrees search routines.
+
+Usage: python benchmark.py [directory] [pairs]
+       python benchmark.py frontiers
+"""
+
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import csr
+import degrees
+import landmarks
+import nameindex
+import snapshot
+import util
+
+
+def random_pairs(count, seed=0):
+    """
+    Returns `count` random (source, target) person_id pairs.
+    """
+    rng = random.Random(seed)
+    person_ids = sorted(degrees.people)
+    return [(rng.choice(person_ids), rng.choice(person_ids)) for _ in range(count)]
+
+
+def time_search(search, pairs):
+    """
+    Runs `search` over every pair, returning the elapsed seconds
+    and the list of path lengths (None where not connected).
+    """
+    lengths = []
+    start = time.perf_counter()
+    for source, target in pairs:
+        path = search(source, target)
+        lengths.append(None if path is None else len(path))
+    return time.perf_counter() - start, lengths
+
+
+def measure_load(load, directory):
+    """
+    Runs `load(directory)`, returning its result, elapsed seconds
+    and peak traced memory in bytes.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    data = load(directory)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return data, elapsed, peak
+
+
+def benchmark_search(pairs, graph):
+    """
+    Compares single-ended and bidirectional breadth-first search,
+    over the dict layout and the compact graph.
+    """
+    searches = {
+        "breadth_first_path": degrees.breadth_first_path,
+        "shortest_path (dict)": degrees.shortest_path,
+        "shortest_path (csr)": lambda source, target: degrees.shortest_path(source, target, graph),
+    }
+    results = {}
+    for name, search in searches.items():
+        elapsed, lengths = time_search(search, pairs)
+        results[name] = lengths
+        print(f"  {name:<20} {elapsed:8.3f}s  {1000 * elapsed / len(pairs):8.2f}ms/query")
+    if len(set(map(tuple, results.values()))) != 1:
+        sys.exit("Path lengths differ between searches.")
+
+
+def benchmark_landmarks(pairs, graph, count=16):
+    """
+    Compares people expanded by breadth-first, bidirectional and
+    landmark A* searches.
+    """
+    start = time.perf_counter()
+    index = landmarks.build_index(graph, count)
+    print(f"  built {len(index.landmarks)} landmarks in {time.perf_counter() - start:.3f}s")
+
+    searches = {
+        "breadth-first": lambda source, target, stats: csr.paths_from(graph, source, [target], stats)[target],
+        "bidirectional": lambda source, target, stats: csr.search(graph, source, target, stats),
+        "landmark A*": lambda source, target, stats: landmarks.search(graph, index, source, target, stats),
+    }
+    pairs = [(graph.person_index(source), graph.person_index(target)) for source, target in pairs]
+    results = {}
+    for name, search in searches.items():
+        stats, lengths = {"expanded": 0}, []
+        start = time.perf_counter()
+        for source, target in pairs:
+            path = search(source, target, stats)
+            lengths.append(None if path is None else len(path))
+        elapsed = time.perf_counter() - start
+        results[name] = lengths
+        print(f"  {name:<20} {elapsed:8.3f}s  {stats['expanded'] / len(pairs):12.1f} people expanded/query")
+    if len(set(map(tuple, results.values()))) != 1:
+        sys.exit("Path lengths differ between searches.")
+
+
+def benchmark_names(graph, count, seed=0):
+    """
+    Times prefix and fuzzy name lookups for random names, the fuzzy
+    ones with a typo.
+    """
+    start = time.perf_counter()
+    index = nameindex.NameIndex(graph)
+    print(f"  built index in {time.perf_counter() - start:.3f}s")
+
+    rng = random.Random(seed)
+    names = [graph.person_names[rng.randrange(len(graph.person_ids))] for _ in range(count)]
+    typos = []
+    for name in names:
+        position = rng.randrange(len(name))
+        typos.append(name[:position] + rng.choice("aeiou") + name[position + 1:])
+
+    lookups = {
+        "prefix": lambda: [index.prefix(name[:3]) for name in names],
+        "fuzzy": lambda: [index.fuzzy(name, 1) for name in typos],
+        "search": lambda: [index.search(name) for name in typos],
+    }
+    for lookup_name, lookup in lookups.items():
+        start = time.perf_counter()
+        results = lookup()
+        elapsed = time.perf_counter() - start
+        found = sum(1 for candidates in results if candidates)
+        print(f"  {lookup_name:<20} {1000 * elapsed / count:8.3f}ms/lookup  {found}/{count} found")
+
+
+def split_dataset(directory, destination, fraction):
+    """
+    Copies all but the last `fraction` of each CSV file's rows to
+    `destination`, also holding back stars of held back people and
+    movies, and returns the lines held back for each file.
+    """
+    lines = {}
+    for filename in snapshot.SOURCES:
+        with open(os.path.join(directory, filename), encoding="utf-8", newline="") as f:
+            lines[filename] = f.readlines()
+
+    held_back, held_back_ids = {}, set()
+    for filename in ["people.csv", "movies.csv"]:
+        keep = len(lines[filename]) - int((len(lines[filename]) - 1) * fraction)
+        held_back[filename] = lines[filename][keep:]
+        lines[filename] = lines[filename][:keep]
+        held_back_ids.update(row[0] for row in csv.reader(held_back[filename]))
+
+    stars = lines["stars.csv"]
+    keep = len(stars) - int((len(stars) - 1) * fraction)
+    kept = [stars[0]] + [
+        line for line, row in zip(stars[1:keep], csv.reader(stars[1:keep]))
+        if held_back_ids.isdisjoint(row)
+    ]
+    kept_lines = set(kept)
+    held_back["stars.csv"] = [line for line in stars[1:] if line not in kept_lines]
+    lines["stars.csv"] = kept
+
+    for filename in snapshot.SOURCES:
+        with open(os.path.join(destination, filename), "w", encoding="utf-8", newline="") as f:
+            f.writelines(lines[filename])
+    return held_back
+
+
+def benchmark_updates(directory, fraction=0.01):
+    """
+    Compares appending `fraction` new rows to a loaded graph against
+    reloading everything.
+    """
+    with tempfile.TemporaryDirectory() as destination:
+        held_back = split_dataset(directory, destination, fraction)
+        degrees.load_data(destination)
+        for filename, lines in held_back.items():
+            with open(os.path.join(destination, filename), "a", encoding="utf-8", newline="") as f:
+                f.writelines(lines)
+
+        start = time.perf_counter()
+        added = degrees.refresh_data(destination, save=False)
+        refresh_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        snapshot.save_snapshot(degrees.csr_graph, destination)
+        save_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        reloaded = csr.load_graph(destination)
+        reload_seconds = time.perf_counter() - start
+
+        print(f"  appended {added[0]} people, {added[1]} movies, {added[2]} stars")
+        print(f"  refresh_data     {refresh_seconds:8.3f}s")
+        print(f"  snapshot rewrite {save_seconds:8.3f}s")
+        print(f"  full reload      {reload_seconds:8.3f}s")
+
+        updated = degrees.csr_graph
+        for source, target in random_pairs(100):
+            path = csr.search(updated, updated.person_index(source), updated.person_index(target))
+            expected = csr.search(reloaded, reloaded.person_index(source), reloaded.person_index(target))
+            if (path is None) != (expected is None) or (path is not None and len(path) != len(expected)):
+                sys.exit("Updated graph differs from reloaded graph.")
+
+
+class ListStackFrontier():
+    """
+    The original list-backed frontier, for comparison.
+    """
+    def __init__(self):
+        self.frontier = []
+
+    def add(self, node):
+        self.frontier.append(node)
+
+    def contains_state(self, state):
+        return any(node.state == state for node in self.frontier)
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier[-1]
+            self.frontier = self.frontier[:-1]
+            return node
+
+
+class ListQueueFrontier(ListStackFrontier):
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier[0]
+            self.frontier = self.frontier[1:]
+            return node
+
+
+def time_frontier(frontier, count):
+    """
+    Adds `count` nodes, checking for each state first as a search
+    would, then removes them all, returning the elapsed seconds.
+    """
+    start = time.perf_counter()
+    for state in range(count):
+        if not frontier.contains_state(state):
+            frontier.add(util.Node(state, None, None))
+    while not frontier.empty():
+        frontier.remove()
+    return time.perf_counter() - start
+
+
+def benchmark_frontiers():
+    """
+    Compares the list-backed frontiers with the deque and heap ones.
+    """
+    frontiers = {
+        "ListStackFrontier": (ListStackFrontier, [10**3, 10**4]),
+        "ListQueueFrontier": (ListQueueFrontier, [10**3, 10**4]),
+        "StackFrontier": (util.StackFrontier, [10**3, 10**4, 10**5, 10**6]),
+        "QueueFrontier": (util.QueueFrontier, [10**3, 10**4, 10**5, 10**6]),
+        "PriorityFrontier": (lambda: util.PriorityFrontier(lambda node: -node.state),
+                             [10**3, 10**4, 10**5, 10**6]),
+    }
+    for name, (frontier, sizes) in frontiers.items():
+        timings = "  ".join(f"{size:>8}: {time_frontier(frontier(), size):8.3f}s" for size in sizes)
+        print(f"  {name:<18} {timings}")
+
+
+def main():
+    if sys.argv[1:] == ["frontiers"]:
+        print("Frontier add, contains_state and remove")
+        benchmark_frontiers()
+        return
+
+    if len(sys.argv) > 3:
+        sys.exit("Usage: python benchmark.py [directory] [pairs]")
+    directory = sys.argv[1] if len(sys.argv) > 1 else "large"
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    print("Loading data...")
+    _, dict_seconds, dict_bytes = measure_load(degrees.load_csv, directory)
+    graph, csr_seconds, csr_bytes = measure_load(csr.load_graph, directory)
+    snapshot.save_snapshot(graph, directory)
+    _, snapshot_seconds, snapshot_bytes = measure_load(snapshot.load_snapshot, directory)
+    print("Data loaded.")
+    print(f"  dict layout  {dict_seconds:8.3f}s  {dict_bytes / 2**20:8.1f}MiB")
+    print(f"  csr layout   {csr_seconds:8.3f}s  {csr_bytes / 2**20:8.1f}MiB")
+    print(f"  csr snapshot {snapshot_seconds:8.3f}s  {snapshot_bytes / 2**20:8.1f}MiB")
+
+    pairs = random_pairs(count)
+    print(f"Search over {count} random pairs")
+    benchmark_search(pairs, graph)
+    print(f"Landmark search over {count} random pairs")
+    benchmark_landmarks(pairs, graph)
+    print(f"Name lookups for {count} random names")
+    benchmark_names(graph, count)
+    print("Appending 1% new rows")
+    benchmark_updates(directory)
+
+
+if __name__ == "__main__":
+    main()
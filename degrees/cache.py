@@ -0,0 +1,211 @@
+"""
+Result cache for repeated degrees queries.
+
+Separation is symmetric, so a query and its reverse share one entry in
+a bounded LRU cache of paths, with the path reversed as needed. People
+queried often enough ("hot" people) also get a cached breadth-first
+tree, from which a path to anyone else is read off without searching.
+Query counts are halved every so often, so that only people queried
+often lately stay hot. A tree is only built for a person queried more
+than the person with the coldest tree, whose tree it then replaces.
+Everything cached is dropped when the graph changes.
+"""
+
+from collections import Counter, OrderedDict
+
+import csr
+
+
+class PathCache():
+    def __init__(self, capacity=10000, tree_capacity=16, hot_threshold=8, decay_interval=1000):
+        self.capacity = capacity
+        self.tree_capacity = tree_capacity
+        self.hot_threshold = hot_threshold
+        self.decay_interval = decay_interval
+
+        # Maps (first, second) person indices, first <= second, to the
+        # (movie, person) path from first to second, or None
+        self.paths = OrderedDict()
+
+        # Maps a person index to its (parent people, parent movies) tree
+        self.trees = OrderedDict()
+
+        # Number of queries involving each person, halved every
+        # decay_interval lookups
+        self.queries = Counter()
+        self.lookups = 0
+
+        # The graph, and its version, that everything cached is for
+        self.graph = None
+        self.version = None
+
+        self.counters = Counter()
+
+    def stats(self):
+        """
+        Returns hit, miss and eviction counters and current sizes.
+        """
+        stats = {name: self.counters[name] for name in
+                 ["hits", "misses", "evictions", "tree_hits", "tree_builds", "tree_evictions",
+                  "invalidations"]}
+        stats["paths"] = len(self.paths)
+        stats["trees"] = len(self.trees)
+        return stats
+
+    def invalidate(self):
+        """
+        Drops every cached path and tree.
+        """
+        self.paths.clear()
+        self.trees.clear()
+        self.queries.clear()
+        self.counters["invalidations"] += 1
+
+    def check(self, graph):
+        """
+        Invalidates the cache if `graph` is not the graph, or version of
+        it, that the cache holds results for.
+        """
+        if graph is not self.graph or graph.version != self.version:
+            if self.graph is not None:
+                self.invalidate()
+            self.graph, self.version = graph, graph.version
+
+    def lookup(self, graph, source, target, build=True):
+        """
+        Returns (True, path) if the path between two person indices is
+        cached or can be read from a cached tree, else (False, None).
+
+        If `build`, also builds the tree of a person who has become hot;
+        otherwise the caller can build the trees of hot_people itself.
+        """
+        self.check(graph)
+        self.count(source, target)
+
+        key = (min(source, target), max(source, target))
+        if key in self.paths:
+            self.paths.move_to_end(key)
+            self.counters["hits"] += 1
+            path = self.paths[key]
+            return True, path if source <= target or path is None else reverse_path(key[0], path)
+
+        if build:
+            for person in self.hot_people(source, target):
+                self.add_tree(person, csr.bfs_tree(graph, person))
+
+        if source in self.trees:
+            self.trees.move_to_end(source)
+            self.counters["tree_hits"] += 1
+            return True, path_from_tree(self.trees[source], source, target)
+        if target in self.trees:
+            self.trees.move_to_end(target)
+            self.counters["tree_hits"] += 1
+            path = path_from_tree(self.trees[target], target, source)
+            return True, None if path is None else reverse_path(target, path)
+
+        self.counters["misses"] += 1
+        return False, None
+
+    def count(self, *people):
+        """
+        Counts a query involving `people`, halving every count once
+        decay_interval queries have been counted.
+        """
+        for person in people:
+            self.queries[person] += 1
+        self.lookups += 1
+        if self.lookups % self.decay_interval == 0:
+            self.queries = Counter({person: count // 2 for person, count in self.queries.items() if count > 1})
+
+    def hot_people(self, *people):
+        """
+        Returns those of `people` that do not have a tree and deserve
+        one: queried at least hot_threshold times, and, once the trees
+        are full, more often than the person with the coldest tree.
+        """
+        hot = [person for person in dict.fromkeys(people)
+               if person not in self.trees and self.queries[person] >= self.hot_threshold]
+        if hot and len(self.trees) >= self.tree_capacity:
+            coldest = self.queries[self.coldest()]
+            hot = [person for person in hot if self.queries[person] > coldest]
+        return hot
+
+    def coldest(self):
+        """
+        Returns the person with a tree queried least often, the least
+        recently used first among equals.
+        """
+        return min(self.trees, key=self.queries.__getitem__)
+
+    def store(self, graph, source, target, path):
+        """
+        Caches the path from one person index to another, evicting the
+        least recently used path if the cache is full.
+        """
+        self.check(graph)
+        key = (min(source, target), max(source, target))
+        value = path if source <= target or path is None else reverse_path(source, path)
+        self.paths[key] = value
+        self.paths.move_to_end(key)
+        while len(self.paths) > self.capacity:
+            self.paths.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def add_tree(self, person, tree):
+        """
+        Caches a person's tree, evicting the coldest tree if there are
+        too many. The evicted person's count restarts from zero, so
+        their tree is not rebuilt until they are hot again.
+        """
+        self.trees[person] = tree
+        self.counters["tree_builds"] += 1
+        while len(self.trees) > self.tree_capacity:
+            coldest = self.coldest()
+            del self.trees[coldest]
+            del self.queries[coldest]
+            self.counters["tree_evictions"] += 1
+
+    def shortest_path(self, graph, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, from the cache when
+        possible.
+
+        If no possible path, returns None.
+        """
+        source, target = graph.person_index(source), graph.person_index(target)
+        found, path = self.lookup(graph, source, target)
+        if not found:
+            path = csr.search(graph, source, target)
+            self.store(graph, source, target, path)
+        if path is None:
+            return None
+        return [(graph.movie_ids[movie], graph.person_ids[person]) for movie, person in path]
+
+
+def reverse_path(source, path):
+    """
+    Returns the (movie, person) path from `source` reversed, so that it
+    leads from the last person back to `source`.
+    """
+    people = [source] + [person for _, person in path]
+    movies = [movie for movie, _ in path]
+    return list(zip(reversed(movies), reversed(people[:-1])))
+
+
+def path_from_tree(tree, root, person):
+    """
+    Returns the (movie, person) path from a tree's root to `person`,
+    or None if the tree does not reach them.
+    """
+    parent_people, parent_movies = tree
+    if person == root:
+        return []
+    if parent_people[person] == -1:
+        return None
+    path = []
+    while person != root:
+        path.append((parent_movies[person], person))
+        person = parent_people[person]
+    path.reverse()
+    return path
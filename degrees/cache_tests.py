@@ -0,0 +1,91 @@
+import random
+import unittest
+
+import cache
+import csr
+from csr_tests import graph_from_rows, random_rows
+
+
+class TestPathCache(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = graph_from_rows(*random_rows(people=300, movies=150, stars=900))
+
+    def test_reverse_path(self):
+        path = csr.search(self.graph, 0, 1) or []
+        target = path[-1][1] if path else 0
+        reversed_path = cache.reverse_path(0, path)
+        self.assertEqual(len(path), len(reversed_path))
+        self.assertEqual(path, cache.reverse_path(target, reversed_path))
+        self.assertEqual([], cache.reverse_path(0, []))
+
+    def test_lookup_both_directions(self):
+        path_cache = cache.PathCache(hot_threshold=1)
+        rng = random.Random(0)
+        people = range(len(self.graph.person_ids))
+        for _ in range(200):
+            source, target = rng.choice(people), rng.choice(people)
+            found, path = path_cache.lookup(self.graph, source, target)
+            if not found:
+                path = csr.search(self.graph, source, target)
+                path_cache.store(self.graph, source, target, path)
+            for first, second, cached in [(source, target, path),
+                                          (target, source, path_cache.lookup(self.graph, target, source)[1])]:
+                expected = csr.search(self.graph, first, second)
+                self.assertEqual(expected is None, cached is None)
+                if cached is not None:
+                    self.assertEqual(len(expected), len(cached))
+                    person = first
+                    for movie, next_person in cached:
+                        self.assertIn(movie, self.graph.movies_of(person))
+                        self.assertIn(movie, self.graph.movies_of(next_person))
+                        person = next_person
+                    self.assertEqual(second, person)
+        self.assertGreater(path_cache.counters["tree_hits"], 0)
+
+    def test_trees_do_not_thrash(self):
+        # Twice as many equally hot people as trees, each queried with
+        # someone new every time so paths are never cached
+        path_cache = cache.PathCache(tree_capacity=16)
+        people = len(self.graph.person_ids)
+        hot = list(range(32))
+        rng = random.Random(1)
+        for _ in range(200):
+            rng.shuffle(hot)
+            for person in hot:
+                path_cache.shortest_path(self.graph, self.graph.person_ids[person],
+                                         self.graph.person_ids[rng.randrange(32, people)])
+        self.assertLessEqual(path_cache.counters["tree_builds"], 4 * path_cache.tree_capacity)
+        self.assertEqual(path_cache.tree_capacity, len(path_cache.trees))
+
+    def test_hot_person_replaces_coldest(self):
+        path_cache = cache.PathCache(tree_capacity=2, hot_threshold=2)
+        for person in [0, 0, 1, 1, 1]:
+            path_cache.count(person)
+        self.assertEqual([0, 1], path_cache.hot_people(0, 1))
+        for person in [0, 1]:
+            path_cache.add_tree(person, csr.bfs_tree(self.graph, person))
+
+        # Only beating the coldest tree's count earns a tree
+        path_cache.count(2)
+        path_cache.count(2)
+        self.assertEqual([], path_cache.hot_people(2))
+        path_cache.count(2)
+        self.assertEqual([2], path_cache.hot_people(2))
+        path_cache.add_tree(2, csr.bfs_tree(self.graph, 2))
+        self.assertEqual({1, 2}, set(path_cache.trees))
+
+        # The evicted person has to earn their place again
+        path_cache.count(0)
+        path_cache.count(0)
+        self.assertEqual([], path_cache.hot_people(0))
+
+    def test_counts_decay(self):
+        path_cache = cache.PathCache(hot_threshold=2, decay_interval=4)
+        for person in [0, 0, 0, 1]:
+            path_cache.count(person)
+        self.assertEqual({0: 1}, dict(path_cache.queries))
+        self.assertEqual([], path_cache.hot_people(0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+Binary cache files, as used for the degrees snapshot and landmark index
+and for pagerank's link and rank caches.
+
+A cache file is a preamble, a JSON header, and then named sections of
+raw bytes, each starting on an ALIGNMENT-byte boundary so that it can
+be memory-mapped and cast to an array in place.
+"""
+
+import json
+import mmap
+import os
+import struct
+
+# Magic, then version and header length as little-endian unsigned ints
+PREAMBLE = struct.Struct("<8sII")
+ALIGNMENT = 8
+
+
+def write_file(path, magic, version, header, sections):
+    """
+    Writes a cache file of a JSON-serialisable header dict and a dict
+    of named bytes-like sections. The header is stored with a
+    "sections" entry giving the start and length of each section.
+    """
+    layout, chunks, position = {}, [], 0
+    for name, data in sections.items():
+        data = memoryview(data).cast("B")
+        layout[name] = [position, len(data)]
+        chunks.append(data)
+        position += len(data)
+        padding = -position % ALIGNMENT
+        chunks.append(bytes(padding))
+        position += padding
+
+    header = json.dumps(dict(header, sections=layout)).encode("utf-8")
+    data_start = PREAMBLE.size + len(header)
+    data_start += -data_start % ALIGNMENT
+
+    # Write to a temporary file and rename, so readers never see a partial file
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as f:
+            f.write(PREAMBLE.pack(magic, version, len(header)))
+            f.write(header)
+            f.write(bytes(data_start - PREAMBLE.size - len(header)))
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def read_file(path, magic, version):
+    """
+    Memory-maps a cache file, returning its header dict and a dict of
+    memoryviews of its sections.
+
+    Returns None if there is no such file, or it has another magic or version.
+    """
+    try:
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    if len(mapped) < PREAMBLE.size:
+        return None
+    file_magic, file_version, header_length = PREAMBLE.unpack_from(mapped)
+    if file_magic != magic or file_version != version:
+        return None
+    header = json.loads(mapped[PREAMBLE.size:PREAMBLE.size + header_length])
+
+    data_start = PREAMBLE.size + header_length
+    data_start += -data_start % ALIGNMENT
+    buffer = memoryview(mapped)[data_start:]
+    sections = {name: buffer[start:start + length] for name, (start, length) in header["sections"].items()}
+    return header, sections
@@ -0,0 +1,44 @@
+"""
+Connected component statistics for the degrees actor graph.
+
+Components are labelled with union-find when the graph is built
+(see csr.label_components), and stored with the snapshot.
+
+Usage: python components.py directory [sizes]
+"""
+
+import sys
+from collections import Counter
+
+import degrees
+
+
+def component_sizes(graph):
+    """
+    Returns the size of each component, largest first.
+    """
+    counts = Counter(graph.component(person) for person in range(len(graph.person_ids)))
+    return sorted(counts.values(), reverse=True)
+
+
+def main():
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python components.py directory [sizes]")
+    directory = sys.argv[1]
+    shown = int(sys.argv[2]) if len(sys.argv) == 3 else 10
+
+    print("Loading data...")
+    degrees.load_data(directory)
+    print("Data loaded.")
+
+    sizes = component_sizes(degrees.csr_graph)
+    people = sum(sizes)
+    print(f"{len(sizes)} components over {people} people.")
+    for position, size in enumerate(sizes[:shown], start=1):
+        print(f"  {position}: {size} people ({100 * size / people:.2f}%)")
+    isolated = sum(1 for size in sizes if size == 1)
+    print(f"{isolated} people share no movie with anyone.")
+
+
+if __name__ == "__main__":
+    main()
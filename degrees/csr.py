@@ -0,0 +1,684 @@
+"""
+Compact integer-indexed graph for the degrees dataset.
+
+People and movies are interned to dense integers, and the bipartite
+person-movie graph is stored as compressed sparse row (CSR) arrays:
+the movies of person `p` are `person_movies[person_offsets[p]:person_offsets[p + 1]]`,
+and the stars of movie `m` are `movie_stars[movie_offsets[m]:movie_offsets[m + 1]]`.
+"""
+
+import csv
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from collections.abc import Mapping
+
+
+class SearchLimitExceeded(Exception):
+    """
+    Raised when a search would expand more people than its limit allows.
+    """
+
+
+class Graph():
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies, movie_offsets, movie_stars,
+                 name_keys, name_order, components,
+                 person_id_keys, person_id_order, movie_id_keys, movie_id_order):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_stars = movie_stars
+
+        # Lowercase names in sorted order, and the person at each position
+        self.name_keys = name_keys
+        self.name_order = name_order
+
+        # IMDB ids in sorted order, and the person or movie at each position
+        self.person_id_keys = person_id_keys
+        self.person_id_order = person_id_order
+        self.movie_id_keys = movie_id_keys
+        self.movie_id_order = movie_id_order
+
+        # Connected component id of each person; after updates, ids are
+        # merged through component_parents (see component)
+        self.components = components
+        self.component_parents = None
+
+        # Movies, stars and names added by apply since the arrays were built
+        self.extra_movies = {}
+        self.extra_stars = {}
+        self.extra_names = {}
+
+        # Size and modification time of each CSV file the graph reflects,
+        # and a count of the updates applied since
+        self.sources = None
+        self.version = 0
+
+        # Id lookups by dict, once built from a CSV load or by apply;
+        # until then ids are bisected in the sorted keys
+        self._person_index = None
+        self._movie_index = None
+
+        # Dict-shaped views, so code written against degrees.people,
+        # degrees.movies and degrees.names runs unchanged
+        self.people = PeopleView(self)
+        self.movies = MoviesView(self)
+        self.names = NamesView(self)
+
+    def person_index(self, person_id):
+        """
+        Returns the integer index for an IMDB person id.
+        """
+        if self._person_index is None:
+            return find_id(self.person_id_keys, self.person_id_order, person_id)
+        return self._person_index[person_id]
+
+    def movie_index(self, movie_id):
+        """
+        Returns the integer index for an IMDB movie id.
+        """
+        if self._movie_index is None:
+            return find_id(self.movie_id_keys, self.movie_id_order, movie_id)
+        return self._movie_index[movie_id]
+
+    def movies_of(self, person):
+        """
+        Returns the movie indices a person index starred in.
+        """
+        movies = self.person_movies[self.person_offsets[person]:self.person_offsets[person + 1]]
+        if person in self.extra_movies:
+            return list(movies) + self.extra_movies[person]
+        return movies
+
+    def stars_of(self, movie):
+        """
+        Returns the person indices starring in a movie index.
+        """
+        stars = self.movie_stars[self.movie_offsets[movie]:self.movie_offsets[movie + 1]]
+        if movie in self.extra_stars:
+            return list(stars) + self.extra_stars[movie]
+        return stars
+
+    def component(self, person):
+        """
+        Returns the connected component id of a person index.
+        """
+        if self.component_parents is None:
+            return self.components[person]
+        return find(self.component_parents, self.components[person])
+
+    def person_indices_for_name(self, name):
+        """
+        Returns the person indices whose name matches `name`, ignoring case.
+        """
+        key = name.lower()
+        position = bisect_left(self.name_keys, key)
+        indices = []
+        while position < len(self.name_keys) and self.name_keys[position] == key:
+            indices.append(self.name_order[position])
+            position += 1
+        return indices + self.extra_names.get(key, [])
+
+    def apply(self, people_rows=(), movie_rows=(), star_rows=()):
+        """
+        Adds rows shaped like those of people.csv, movies.csv and
+        stars.csv to the graph in place, merging components as stars
+        link them. Rows already in the graph, and stars of unknown
+        people or movies, are ignored.
+
+        Returns the number of people, movies and stars added.
+        """
+        added_people = added_movies = added_stars = 0
+        self._make_growable()
+
+        for row in people_rows:
+            if row["id"] in self.people:
+                continue
+            person = len(self.person_ids)
+            self._person_index[row["id"]] = person
+            self.person_ids.append(row["id"])
+            self.person_names.append(row["name"])
+            self.person_births.append(row["birth"])
+            self.person_offsets.append(self.person_offsets[-1])
+            self.extra_names.setdefault(row["name"].lower(), []).append(person)
+            self.components.append(len(self.component_parents))
+            self.component_parents.append(len(self.component_parents))
+            added_people += 1
+
+        for row in movie_rows:
+            if row["id"] in self.movies:
+                continue
+            self._movie_index[row["id"]] = len(self.movie_ids)
+            self.movie_ids.append(row["id"])
+            self.movie_titles.append(row["title"])
+            self.movie_years.append(row["year"])
+            self.movie_offsets.append(self.movie_offsets[-1])
+            added_movies += 1
+
+        for row in star_rows:
+            try:
+                person = self.person_index(row["person_id"])
+                movie = self.movie_index(row["movie_id"])
+            except KeyError:
+                continue
+            if movie in self.movies_of(person):
+                continue
+            stars = self.stars_of(movie)
+            self.extra_movies.setdefault(person, []).append(movie)
+            self.extra_stars.setdefault(movie, []).append(person)
+            if len(stars) > 0:
+                # Keep the lower (larger) component id as the root
+                first, second = self.component(person), self.component(stars[0])
+                if first != second:
+                    self.component_parents[max(first, second)] = min(first, second)
+            added_stars += 1
+
+        if added_people or added_movies or added_stars:
+            self.version += 1
+        return added_people, added_movies, added_stars
+
+    def _make_growable(self):
+        """
+        Copies memory-mapped arrays that apply has to append to.
+        """
+        if self._person_index is None:
+            self._person_index = {pid: i for i, pid in enumerate(self.person_ids)}
+        if self._movie_index is None:
+            self._movie_index = {mid: i for i, mid in enumerate(self.movie_ids)}
+        for field in ("person_offsets", "movie_offsets", "components"):
+            values = getattr(self, field)
+            if not isinstance(values, array):
+                setattr(self, field, array("i", values.tobytes()))
+        if self.component_parents is None:
+            self.component_parents = array("i", range(max(self.components, default=-1) + 1))
+
+    def compact(self):
+        """
+        Returns a new Graph with every update applied folded into
+        freshly built arrays.
+        """
+        movie_count = len(self.movie_ids)
+        edges = [person * movie_count + movie
+                 for person in range(len(self.person_ids))
+                 for movie in self.movies_of(person)]
+        edges.sort()
+        graph = build_graph(list(self.person_ids), list(self.person_names), list(self.person_births),
+                            list(self.movie_ids), list(self.movie_titles), list(self.movie_years),
+                            edges)
+        graph.sources = self.sources
+        return graph
+
+
+class PeopleView(Mapping):
+    """
+    Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids).
+    """
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, person_id):
+        graph = self.graph
+        person = graph.person_index(person_id)
+        return {
+            "name": graph.person_names[person],
+            "birth": graph.person_births[person],
+            "movies": {graph.movie_ids[movie] for movie in graph.movies_of(person)}
+        }
+
+    def __contains__(self, person_id):
+        try:
+            self.graph.person_index(person_id)
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        return iter(self.graph.person_ids)
+
+    def __len__(self):
+        return len(self.graph.person_ids)
+
+
+class MoviesView(Mapping):
+    """
+    Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids).
+    """
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, movie_id):
+        graph = self.graph
+        movie = graph.movie_index(movie_id)
+        return {
+            "title": graph.movie_titles[movie],
+            "year": graph.movie_years[movie],
+            "stars": {graph.person_ids[person] for person in graph.stars_of(movie)}
+        }
+
+    def __contains__(self, movie_id):
+        try:
+            self.graph.movie_index(movie_id)
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        return iter(self.graph.movie_ids)
+
+    def __len__(self):
+        return len(self.graph.movie_ids)
+
+
+class NamesView(Mapping):
+    """
+    Maps lowercase names to a set of corresponding person_ids.
+    """
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, name):
+        indices = self.graph.person_indices_for_name(name)
+        if not indices:
+            raise KeyError(name)
+        return {self.graph.person_ids[person] for person in indices}
+
+    def __iter__(self):
+        previous = None
+        for key in self.graph.name_keys:
+            if key != previous:
+                yield key
+                previous = key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+def load_graph(directory):
+    """
+    Load data from CSV files into a compact Graph.
+    """
+    person_ids, person_names, person_births, person_index = [], [], [], {}
+    with open(f"{directory}/people.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            person_index[row["id"]] = len(person_ids)
+            person_ids.append(row["id"])
+            person_names.append(row["name"])
+            person_births.append(row["birth"])
+
+    movie_ids, movie_titles, movie_years, movie_index = [], [], [], {}
+    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            movie_index[row["id"]] = len(movie_ids)
+            movie_ids.append(row["id"])
+            movie_titles.append(row["title"])
+            movie_years.append(row["year"])
+
+    # Encode each (person, movie) star as one integer so duplicates sort together
+    movie_count = len(movie_ids)
+    edges = array("q")
+    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            try:
+                person = person_index[row["person_id"]]
+                movie = movie_index[row["movie_id"]]
+            except KeyError:
+                continue
+            edges.append(person * movie_count + movie)
+
+    graph = build_graph(person_ids, person_names, person_births,
+                        movie_ids, movie_titles, movie_years,
+                        sorted(set(edges)))
+    graph._person_index = person_index
+    graph._movie_index = movie_index
+    return graph
+
+
+def read_appended_rows(path, offset):
+    """
+    Returns the rows of a CSV file after byte `offset`, up to its last
+    complete line, and the offset just past them.
+    """
+    with open(path, "rb") as f:
+        fieldnames = next(csv.reader([f.readline().decode("utf-8")]))
+        f.seek(offset)
+        data = f.read()
+    end = data.rfind(b"\n") + 1
+    rows = list(csv.DictReader(data[:end].decode("utf-8").splitlines(), fieldnames=fieldnames))
+    return rows, offset + end
+
+
+def build_graph(person_ids, person_names, person_births,
+                movie_ids, movie_titles, movie_years, edges):
+    """
+    Builds a Graph from people, movies, and sorted, distinct encoded
+    person * len(movie_ids) + movie edges.
+    """
+    person_offsets, person_movies, movie_offsets, movie_stars = build_csr(
+        edges, len(person_ids), len(movie_ids)
+    )
+    name_keys, name_order = build_name_index(person_names)
+    labels = label_components(len(person_ids), movie_offsets, movie_stars)
+    return Graph(person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies, movie_offsets, movie_stars,
+                 name_keys, name_order, labels,
+                 *build_id_index(person_ids), *build_id_index(movie_ids))
+
+
+def build_csr(edges, person_count, movie_count):
+    """
+    Builds both CSR directions from sorted, distinct encoded
+    person * movie_count + movie edges.
+    """
+    person_offsets = array("i", bytes(4 * (person_count + 1)))
+    movie_offsets = array("i", bytes(4 * (movie_count + 1)))
+    person_movies = array("i", bytes(4 * len(edges)))
+    for i, edge in enumerate(edges):
+        person, movie = divmod(edge, movie_count)
+        person_offsets[person + 1] += 1
+        movie_offsets[movie + 1] += 1
+        person_movies[i] = movie
+    for person in range(person_count):
+        person_offsets[person + 1] += person_offsets[person]
+    for movie in range(movie_count):
+        movie_offsets[movie + 1] += movie_offsets[movie]
+
+    # Counting sort by movie; people stay in ascending order within each movie
+    movie_stars = array("i", bytes(4 * len(edges)))
+    fill = array("i", movie_offsets)
+    for edge in edges:
+        person, movie = divmod(edge, movie_count)
+        movie_stars[fill[movie]] = person
+        fill[movie] += 1
+    return person_offsets, person_movies, movie_offsets, movie_stars
+
+
+def build_name_index(person_names):
+    """
+    Returns lowercase names in sorted order, and the person index at each position.
+    """
+    keys = [name.lower() for name in person_names]
+    order = sorted(range(len(keys)), key=keys.__getitem__)
+    return [keys[person] for person in order], array("i", order)
+
+
+def build_id_index(ids):
+    """
+    Returns ids in sorted order, and the index of each position's id.
+    """
+    order = sorted(range(len(ids)), key=ids.__getitem__)
+    return [ids[i] for i in order], array("i", order)
+
+
+def find_id(keys, order, value):
+    """
+    Returns the index of an id, bisecting its sorted keys, or raises KeyError.
+    """
+    position = bisect_left(keys, value)
+    if position == len(keys) or keys[position] != value:
+        raise KeyError(value)
+    return order[position]
+
+
+def find(parents, person):
+    """
+    Returns the root of a person's set, halving the path as it goes.
+    """
+    while parents[person] != person:
+        parents[person] = parents[parents[person]]
+        person = parents[person]
+    return person
+
+
+def union(parents, sizes, first, second):
+    """
+    Merges the sets of two people, returning the root of the merged set.
+    """
+    first, second = find(parents, first), find(parents, second)
+    if first == second:
+        return first
+    if sizes[first] < sizes[second]:
+        first, second = second, first
+    parents[second] = first
+    sizes[first] += sizes[second]
+    return first
+
+
+def label_components(person_count, movie_offsets, movie_stars):
+    """
+    Returns an array giving each person's component id, numbering
+    components from largest to smallest.
+
+    Two people are in the same component if a chain of shared movies
+    links them, so the stars of each movie are merged with union-find.
+    """
+    parents = array("i", range(person_count))
+    sizes = array("i", [1]) * person_count
+    for movie in range(len(movie_offsets) - 1):
+        stars = movie_stars[movie_offsets[movie]:movie_offsets[movie + 1]]
+        for person in stars[1:]:
+            union(parents, sizes, stars[0], person)
+
+    roots = [find(parents, person) for person in range(person_count)]
+    order = [root for root, _ in sorted(Counter(roots).items(), key=lambda item: (-item[1], item[0]))]
+    labels = {root: label for label, root in enumerate(order)}
+    return array("i", [labels[root] for root in roots])
+
+
+def shortest_path(graph, source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target.
+
+    If no possible path, returns None.
+    """
+    path = search(graph, graph.person_index(source), graph.person_index(target))
+    if path is None:
+        return None
+    return [(graph.movie_ids[movie], graph.person_ids[person]) for movie, person in path]
+
+
+def neighbors_for_person(graph, person_id):
+    """
+    Returns (movie_id, person_id) pairs for people
+    who starred with a given person.
+    """
+    neighbors = set()
+    for movie in graph.movies_of(graph.person_index(person_id)):
+        movie_id = graph.movie_ids[movie]
+        for person in graph.stars_of(movie):
+            neighbors.add((movie_id, graph.person_ids[person]))
+    return neighbors
+
+
+def paths_from(graph, source, targets, stats=None):
+    """
+    Breadth-first search from one person index that answers every
+    target at once, stopping as soon as all targets are reached.
+
+    Returns a dict mapping each target to a list of (movie, person)
+    index pairs, or None if it is not connected to the source.
+    If given, `stats["expanded"]` is increased by the number of
+    people expanded.
+    """
+    component = graph.component(source)
+    remaining = {target for target in targets if graph.component(target) == component}
+    parents = {source: None}
+    remaining.discard(source)
+    frontier = [source]
+    movies_of, stars_of = graph.movies_of, graph.stars_of
+    while frontier and remaining:
+        if stats is not None:
+            stats["expanded"] = stats.get("expanded", 0) + len(frontier)
+        next_frontier = []
+        for person in frontier:
+            for movie in movies_of(person):
+                for neighbor in stars_of(movie):
+                    if neighbor not in parents:
+                        parents[neighbor] = (movie, person)
+                        next_frontier.append(neighbor)
+                        remaining.discard(neighbor)
+        frontier = next_frontier
+
+    paths = {}
+    for target in targets:
+        if target not in parents:
+            paths[target] = None
+            continue
+        path, person = [], target
+        while parents[person] is not None:
+            movie, parent = parents[person]
+            path.append((movie, person))
+            person = parent
+        path.reverse()
+        paths[target] = path
+    return paths
+
+
+def bfs_tree(graph, source):
+    """
+    Breadth-first search from one person index over the whole of its
+    component, recording how each person was first reached.
+
+    Returns arrays giving, for each person, the parent person and the
+    movie they share on a shortest path from the source (or -1 for the
+    source and for people it does not reach).
+    """
+    movies_of, stars_of = graph.movies_of, graph.stars_of
+    parent_people = array("i", [-1]) * len(graph.person_ids)
+    parent_movies = array("i", [-1]) * len(graph.person_ids)
+    seen_movies = bytearray(len(graph.movie_ids))
+    parent_people[source] = source
+    frontier = [source]
+    while frontier:
+        next_frontier = []
+        for person in frontier:
+            for movie in movies_of(person):
+                if seen_movies[movie]:
+                    continue
+                seen_movies[movie] = 1
+                for neighbor in stars_of(movie):
+                    if parent_people[neighbor] == -1:
+                        parent_people[neighbor] = person
+                        parent_movies[neighbor] = movie
+                        next_frontier.append(neighbor)
+        frontier = next_frontier
+    parent_people[source] = -1
+    return parent_people, parent_movies
+
+
+def level_counts(graph, source):
+    """
+    Breadth-first search from one person index over the whole of
+    its component, a frontier at a time.
+
+    Returns a list whose d-th entry is the number of people at
+    distance d from the source (so the first entry is always 1).
+    """
+    movies_of, stars_of = graph.movies_of, graph.stars_of
+    seen_people = bytearray(len(graph.person_ids))
+    seen_movies = bytearray(len(graph.movie_ids))
+    seen_people[source] = 1
+    frontier, counts = [source], []
+    while frontier:
+        counts.append(len(frontier))
+        next_frontier = []
+        for person in frontier:
+            for movie in movies_of(person):
+                # Every star of a movie is reached the first time the movie is
+                if seen_movies[movie]:
+                    continue
+                seen_movies[movie] = 1
+                for neighbor in stars_of(movie):
+                    if not seen_people[neighbor]:
+                        seen_people[neighbor] = 1
+                        next_frontier.append(neighbor)
+        frontier = next_frontier
+    return counts
+
+
+def search(graph, source, target, stats=None, limit=None):
+    """
+    Bidirectional breadth-first search between two person indices.
+
+    Returns a list of (movie, person) index pairs, or None if not connected.
+    If given, `stats["expanded"]` is increased by the number of people
+    in the frontiers expanded. If `limit` is given, raises
+    SearchLimitExceeded rather than expand more people than that.
+    """
+    if source == target:
+        return []
+    if graph.component(source) != graph.component(target):
+        return None
+
+    forward, backward = {source: None}, {target: None}
+    forward_frontier, backward_frontier = [source], [target]
+    expanded = 0
+    while forward_frontier and backward_frontier:
+        expanding = min(len(forward_frontier), len(backward_frontier))
+        expanded += expanding
+        if limit is not None and expanded > limit:
+            raise SearchLimitExceeded(f"search would expand more than {limit} people")
+        if stats is not None:
+            stats["expanded"] = stats.get("expanded", 0) + expanding
+        if len(forward_frontier) <= len(backward_frontier):
+            forward_frontier, meeting = expand_frontier(graph.movies_of, graph.stars_of,
+                                                        forward_frontier, forward, backward)
+        else:
+            backward_frontier, meeting = expand_frontier(graph.movies_of, graph.stars_of,
+                                                         backward_frontier, backward, forward)
+        if meeting is not None:
+            return join_paths(meeting, forward, backward)
+    return None
+
+
+def expand_frontier(movies_of, stars_of, frontier, parents, other_parents):
+    """
+    Expands every person in `frontier` by one movie, recording parents,
+    where `movies_of` gives a person's movies and `stars_of` a movie's
+    stars. Works on person and movie indices or on IMDB ids alike.
+
+    Returns the next frontier, and the first person already reached by
+    the other search (or None if the two searches have not met).
+    """
+    next_frontier = []
+    for person in frontier:
+        for movie in movies_of(person):
+            for neighbor in stars_of(movie):
+                if neighbor not in parents:
+                    parents[neighbor] = (movie, person)
+                    if neighbor in other_parents:
+                        return next_frontier, neighbor
+                    next_frontier.append(neighbor)
+    return next_frontier, None
+
+
+def join_paths(meeting, forward, backward):
+    """
+    Returns the (movie, person) path from the source of `forward`
+    to the source of `backward`, through the `meeting` person.
+    """
+    path = []
+    person = meeting
+    while forward[person] is not None:
+        movie, parent = forward[person]
+        path.append((movie, person))
+        person = parent
+    path.reverse()
+
+    person = meeting
+    while backward[person] is not None:
+        movie, person = backward[person]
+        path.append((movie, person))
+    return path
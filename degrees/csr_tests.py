@@ -0,0 +1,119 @@
+import random
+import unittest
+
+import csr
+
+
+def random_rows(people=120, movies=60, stars=200, seed=0):
+    """
+    Returns rows shaped like those of people.csv, movies.csv and
+    stars.csv, with distinct stars.
+    """
+    rng = random.Random(seed)
+    people_rows = [{"id": str(100 + i), "name": f"Person {i}", "birth": ""} for i in range(people)]
+    movie_rows = [{"id": str(5000 + i), "title": f"Movie {i}", "year": "2000"} for i in range(movies)]
+    pairs = {(rng.randrange(people), rng.randrange(movies)) for _ in range(stars)}
+    star_rows = [{"person_id": people_rows[person]["id"], "movie_id": movie_rows[movie]["id"]}
+                 for person, movie in sorted(pairs)]
+    rng.shuffle(star_rows)
+    return people_rows, movie_rows, star_rows
+
+
+def graph_from_rows(people_rows, movie_rows, star_rows):
+    """
+    Builds a graph from scratch out of people, movie and star rows,
+    keeping people and movies in the order given.
+    """
+    person_index = {row["id"]: i for i, row in enumerate(people_rows)}
+    movie_index = {row["id"]: i for i, row in enumerate(movie_rows)}
+    edges = sorted({person_index[row["person_id"]] * len(movie_rows) + movie_index[row["movie_id"]]
+                    for row in star_rows
+                    if row["person_id"] in person_index and row["movie_id"] in movie_index})
+    return csr.build_graph([row["id"] for row in people_rows], [row["name"] for row in people_rows],
+                           [row["birth"] for row in people_rows],
+                           [row["id"] for row in movie_rows], [row["title"] for row in movie_rows],
+                           [row["year"] for row in movie_rows], edges)
+
+
+def known(graph, star_row):
+    """
+    Returns whether a graph has both the person and movie of a star row.
+    """
+    return star_row["person_id"] in graph.people and star_row["movie_id"] in graph.movies
+
+
+class TestApply(unittest.TestCase):
+
+    def setUp(self):
+        self.people_rows, self.movie_rows, self.star_rows = random_rows()
+
+    def assertSameGraph(self, expected, graph):
+        """
+        Checks that two graphs over the same people agree on who stars
+        in what, on components, and on distances.
+        """
+        people = range(len(expected.person_ids))
+        self.assertEqual(list(expected.person_ids), list(graph.person_ids))
+        for person in people:
+            self.assertEqual(sorted(expected.movies_of(person)), sorted(graph.movies_of(person)))
+        for movie in range(len(expected.movie_ids)):
+            self.assertEqual(sorted(expected.stars_of(movie)), sorted(graph.stars_of(movie)))
+
+        # Component ids may differ, but must group people the same way
+        expected_groups = {}
+        for person in people:
+            expected_groups.setdefault(expected.component(person), set()).add(person)
+        groups = {}
+        for person in people:
+            groups.setdefault(graph.component(person), set()).add(person)
+        self.assertEqual(sorted(map(sorted, expected_groups.values())), sorted(map(sorted, groups.values())))
+
+        rng = random.Random(len(people))
+        for source in rng.sample(people, 10):
+            self.assertEqual(csr.level_counts(expected, source), csr.level_counts(graph, source))
+            for target in rng.sample(people, 10):
+                expected_path = csr.search(expected, source, target)
+                path = csr.search(graph, source, target)
+                self.assertEqual(expected_path is None, path is None)
+                if path is not None:
+                    self.assertEqual(len(expected_path), len(path))
+
+    def test_apply_batches(self):
+        rng = random.Random(1)
+        people_count, movie_count, star_count = 60, 30, 80
+        graph = graph_from_rows(self.people_rows[:people_count], self.movie_rows[:movie_count],
+                                self.star_rows[:star_count])
+
+        # Stars of people or movies not yet added are dropped for good
+        applied = [row for row in self.star_rows[:star_count] if known(graph, row)]
+        while star_count < len(self.star_rows):
+            new_people = rng.randint(0, 10)
+            new_movies = rng.randint(0, 5)
+            new_stars = rng.randint(1, 20)
+            people_rows = self.people_rows[people_count:people_count + new_people]
+            movie_rows = self.movie_rows[movie_count:movie_count + new_movies]
+
+            # Repeated and unknown rows are ignored
+            new_star_rows = self.star_rows[star_count:star_count + new_stars]
+            star_rows = new_star_rows + rng.sample(applied, 3)
+            graph.apply(people_rows + self.people_rows[:1], movie_rows, star_rows)
+
+            people_count += len(people_rows)
+            movie_count += len(movie_rows)
+            star_count += new_stars
+            applied += [row for row in new_star_rows if known(graph, row)]
+            expected = graph_from_rows(self.people_rows[:people_count], self.movie_rows[:movie_count], applied)
+            self.assertSameGraph(expected, graph)
+
+        self.assertSameGraph(graph, graph.compact())
+
+    def test_apply_counts(self):
+        graph = graph_from_rows(self.people_rows[:10], self.movie_rows[:10], [])
+        star = {"person_id": self.people_rows[0]["id"], "movie_id": self.movie_rows[0]["id"]}
+        unknown = {"person_id": "nobody", "movie_id": self.movie_rows[0]["id"]}
+        self.assertEqual((1, 1, 1), graph.apply(self.people_rows[:11], self.movie_rows[10:11], [star, unknown]))
+        self.assertEqual((0, 0, 0), graph.apply(self.people_rows[:11], self.movie_rows[:11], [star]))
+
+
+if __name__ == '__main__':
+    unittest.main()
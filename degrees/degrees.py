@@ -2,6 +2,12 @@ import csv
 import sys
 from collections import deque
 
+import cache
+import csr
+import landmarks
+import nameindex
+import snapshot
+
 # Maps names to a set of corresponding person_ids
 names = {}
 
@@ -11,11 +17,87 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Compact graph backing names, people and movies, once loaded by load_data
+csr_graph = None
+
+# Landmark distance index for csr_graph, if one has been built for the dataset
+landmark_index = None
+
+# Prefix and fuzzy name index for csr_graph, built on first use
+name_index = None
+
+# Recent and hot-person results for searches of csr_graph
+path_cache = cache.PathCache()
+
+
+def load_data(directory, use_landmarks=False):
+    """
+    Load data into memory, memory-mapping the binary snapshot next to
+    the CSV files when it is current, and otherwise parsing the CSV
+    files and writing a fresh snapshot for the next run. With
+    `use_landmarks`, also loads the dataset's landmark index, if one has
+    been built with landmarks.py, for shortest_path to search with.
+    """
+    global csr_graph, landmark_index, names, people, movies
+    csr_graph = snapshot.load_graph(directory)
+    landmark_index = landmarks.load_index(csr_graph, directory) if use_landmarks else None
+    names, people, movies = csr_graph.names, csr_graph.people, csr_graph.movies
+
+
+def update_data(people_rows=(), movie_rows=(), star_rows=()):
+    """
+    Adds rows shaped like those of people.csv, movies.csv and stars.csv
+    to the data loaded by load_data, without reloading it.
+
+    New stars can shorten distances, so cached paths are dropped, as is
+    any landmark index until it is rebuilt with landmarks.py. Returns the number of
+    people, movies and stars added.
+    """
+    global landmark_index
+    added = csr_graph.apply(people_rows, movie_rows, star_rows)
+    if any(added):
+        landmark_index = None
+        path_cache.invalidate()
+    return added
+
+
+def refresh_data(directory, save=True):
+    """
+    Applies rows appended to the CSV files in `directory` since the
+    data was loaded, assuming the files are only ever appended to
+    (if one has shrunk, everything is reloaded instead).
+
+    If `save`, rewrites the snapshot to include the new rows.
+    Returns the number of people, movies and stars added.
+    """
+    stats = snapshot.source_stats(directory)
+    sources = csr_graph.sources
+    if any(stats[filename][0] < sources[filename][0] for filename in snapshot.SOURCES):
+        load_data(directory)
+        return 0, 0, 0
+
+    rows = []
+    for filename in snapshot.SOURCES:
+        appended, end = csr.read_appended_rows(f"{directory}/{filename}", sources[filename][0])
+        rows.append(appended)
+        sources[filename] = [end, stats[filename][1]]
+    added = update_data(*rows)
+    if save and any(added):
+        try:
+            snapshot.save_snapshot(csr_graph, directory)
+        except OSError:
+            pass
+    return added
+
 
-def load_data(directory):
+def load_csv(directory):
     """
-    Load data from CSV files into memory.
+    Load data from CSV files into dictionaries in memory.
     """
+    global csr_graph, landmark_index, names, people, movies
+    csr_graph, landmark_index = None, None
+    names, people, movies = {}, {}, {}
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -52,13 +134,17 @@ def load_data(directory):
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    args = sys.argv[1:]
+    use_landmarks = "--landmarks" in args
+    if use_landmarks:
+        args.remove("--landmarks")
+    if len(args) > 1:
+        sys.exit("Usage: python degrees.py [--landmarks] [directory]")
+    directory = args[0] if args else "large"
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    load_data(directory, use_landmarks)
     print("Data loaded.")
 
     source = person_id_for_name(input("Name: "))
@@ -83,11 +169,59 @@ def main():
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, graph=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    If no possible path, returns None.
+
+    Searches outwards from both source and target, always expanding
+    the smaller frontier, and rebuilds the path from parent pointers
+    where the two searches meet. Runs on `graph`, or the graph loaded
+    by load_data, when there is one rather than dictionaries. People in
+    different connected components of the graph are answered without
+    searching, and repeated queries on the loaded graph are answered
+    from path_cache. If load_data loaded a landmark index, the loaded
+    graph is searched with A* guided by it instead.
+    """
+    graph = graph if graph is not None else csr_graph
+    if graph is not None and graph is csr_graph:
+        if landmark_index is not None:
+            return landmarks.shortest_path(graph, landmark_index, source, target)
+        return path_cache.shortest_path(graph, source, target)
+    if graph is not None:
+        return csr.shortest_path(graph, source, target)
+    if source == target:
+        return []
+
+    def movies_of(person_id):
+        return people[person_id]["movies"]
+
+    def stars_of(movie_id):
+        return movies[movie_id]["stars"]
+
+    # Maps each person reached to the (movie_id, person_id) step that reached them
+    forward, backward = {source: None}, {target: None}
+    forward_frontier, backward_frontier = [source], [target]
+    while forward_frontier and backward_frontier:
+        if len(forward_frontier) <= len(backward_frontier):
+            forward_frontier, meeting = csr.expand_frontier(movies_of, stars_of,
+                                                            forward_frontier, forward, backward)
+        else:
+            backward_frontier, meeting = csr.expand_frontier(movies_of, stars_of,
+                                                             backward_frontier, backward, forward)
+        if meeting is not None:
+            return csr.join_paths(meeting, forward, backward)
+    return None
+
+
+def breadth_first_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching from the
+    source only.
+
     If no possible path, returns None.
     """
 
@@ -107,16 +241,34 @@ def shortest_path(source, target):
                     visited.add(leaf_person_id)
 
 
+def id_order(person_id):
+    """
+    Returns a sort key putting numeric ids in numeric order, before any
+    other ids in lexicographic order.
+    """
+    return (0, int(person_id), "") if person_id.isdigit() else (1, 0, person_id)
+
 
-def person_id_for_name(name)
+def person_id_for_name(name, ambiguity="prompt"):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    `ambiguity` says how to resolve a name shared by several people:
+    "prompt" asks interactively, "first" picks the lowest id, "skip"
+    returns None, and "error" raises a ValueError. Ids are compared as
+    numbers where they are numeric, so "105" comes before "10021".
     """
-    person_ids = list(names.get(name.lower(), set()))
+    person_ids = sorted(names.get(name.lower(), set()), key=id_order)
     if len(person_ids) == 0:
         return None
     elif len(person_ids) > 1:
+        if ambiguity == "first":
+            return person_ids[0]
+        elif ambiguity == "skip":
+            return None
+        elif ambiguity == "error":
+            raise ValueError(f"'{name}' is ambiguous: {', '.join(person_ids)}")
         print(f"Which '{name}'?")
         for person_id in person_ids:
             person = people[person_id]
@@ -134,11 +286,27 @@ def person_id_for_name(name)
         return person_ids[0]
 
 
-def neighbors_for_person(person_id):
+def candidates_for_name(name, limit=10, max_distance=1):
+    """
+    Returns up to `limit` people whose names start with, or are within
+    `max_distance` edits of, `name`, best first, as dictionaries of:
+    person_id, name, birth, movies (a count), match ("exact", "prefix"
+    or "fuzzy") and distance (the edit distance).
+    """
+    global name_index
+    if name_index is None or name_index.graph is not csr_graph:
+        name_index = nameindex.NameIndex(csr_graph)
+    return name_index.search(name, limit, max_distance)
+
+
+def neighbors_for_person(person_id, graph=None):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    graph = graph if graph is not None else csr_graph
+    if graph is not None:
+        return csr.neighbors_for_person(graph, person_id)
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
@@ -0,0 +1,119 @@
+"""
+Find the centre of Hollywood.
+
+For every person (or a random sample of people), counts how many other
+people are at each degree of separation from them, then ranks people
+by their average distance to everyone they are connected to. Per-person
+counts are appended to a checkpoint file as they are computed, so an
+interrupted run resumes where it left off.
+
+Usage: python hollywood.py [--sample N] [--seed S] [--checkpoint FILE] [--top K] directory
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+
+import csr
+import degrees
+
+
+def choose_sources(graph, sample, seed):
+    """
+    Returns the person indices to search from: everyone, or the same
+    random sample for a given seed.
+    """
+    count = len(graph.person_ids)
+    if sample is None or sample >= count:
+        return list(range(count))
+    return sorted(random.Random(seed).sample(range(count), sample))
+
+
+def read_checkpoint(path):
+    """
+    Returns a dict of person_id to level counts already in a checkpoint file.
+    """
+    levels = {}
+    if not os.path.exists(path):
+        return levels
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A partial last line from an interrupted run
+                continue
+            levels[record["person"]] = record["levels"]
+    return levels
+
+
+def compute_levels(graph, sources, checkpoint):
+    """
+    Returns a dict of person_id to level counts for every source,
+    computing and checkpointing those not already in the checkpoint.
+    """
+    levels = read_checkpoint(checkpoint)
+    remaining = [source for source in sources if graph.person_ids[source] not in levels]
+    print(f"{len(sources) - len(remaining)} of {len(sources)} people already done.", file=sys.stderr)
+    with open(checkpoint, "a", encoding="utf-8") as f:
+        for done, source in enumerate(remaining, start=1):
+            person_id = graph.person_ids[source]
+            levels[person_id] = csr.level_counts(graph, source)
+            f.write(json.dumps({"person": person_id, "levels": levels[person_id]}) + "\n")
+            if done % 100 == 0:
+                f.flush()
+                print(f"{done} of {len(remaining)} people searched.", file=sys.stderr)
+    return levels
+
+
+def average_distance(counts):
+    """
+    Returns how many other people are reachable, and their average distance.
+    """
+    reached = sum(counts) - 1
+    if reached == 0:
+        return 0, None
+    return reached, sum(distance * count for distance, count in enumerate(counts)) / reached
+
+
+def rank(levels):
+    """
+    Returns (person_id, reached, average distance) for every person,
+    those reaching the most people first, then by average distance.
+    """
+    ranking = []
+    for person_id, counts in levels.items():
+        reached, average = average_distance(counts)
+        if average is not None:
+            ranking.append((person_id, reached, average))
+    ranking.sort(key=lambda entry: (-entry[1], entry[2], entry[0]))
+    return ranking
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rank people by average degrees of separation.")
+    parser.add_argument("--sample", type=int, help="number of people to search from")
+    parser.add_argument("--seed", type=int, default=0, help="seed for choosing the sample")
+    parser.add_argument("--checkpoint", help="file of per-person level counts to resume from")
+    parser.add_argument("--top", type=int, default=20, help="number of people to print")
+    parser.add_argument("directory")
+    args = parser.parse_args()
+
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(args.directory)
+    print("Data loaded.", file=sys.stderr)
+
+    graph = degrees.csr_graph
+    checkpoint = args.checkpoint or os.path.join(args.directory, f"hollywood-{args.sample or 'all'}-{args.seed}.jsonl")
+    levels = compute_levels(graph, choose_sources(graph, args.sample, args.seed), checkpoint)
+
+    for position, (person_id, reached, average) in enumerate(rank(levels)[:args.top], start=1):
+        name = degrees.people[person_id]["name"]
+        histogram = " ".join(str(count) for count in levels[person_id][1:])
+        print(f"{position}: {name} ({person_id}) average {average:.3f} over {reached} people [{histogram}]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+Landmark distance index for degrees searches.
+
+K landmark people are chosen, and the distance from each landmark to
+every person is stored. By the triangle inequality, for any landmark L,
+|d(L, v) - d(L, target)| is a lower bound on d(v, target), which drives
+an A* search and proves two people unconnected when a landmark reaches
+one but not the other.
+
+The index is saved next to the CSV files and rebuilt when they change.
+
+Usage: python landmarks.py directory [landmarks]
+"""
+
+import heapq
+import os
+import sys
+
+import cachefile
+import snapshot
+
+MAGIC = b"DEGLMRK\0"
+VERSION = 2
+FILENAME = "degrees.landmarks"
+
+# Distance stored for people a landmark cannot reach
+UNREACHABLE = 255
+
+# Landmarks consulted per search, those giving the best bound at the source
+ACTIVE_LANDMARKS = 4
+
+
+class LandmarkIndex():
+    def __init__(self, landmarks, distances):
+        # Person indices of the landmarks
+        self.landmarks = landmarks
+
+        # Distances from the k-th landmark to person p are at k * people + p
+        self.distances = distances
+        self.people = len(distances) // len(landmarks) if landmarks else 0
+
+    def rows(self):
+        """
+        Returns each landmark's distances to every person.
+        """
+        return [self.distances[k * self.people:(k + 1) * self.people]
+                for k in range(len(self.landmarks))]
+
+
+def distances_from(graph, source):
+    """
+    Returns a bytearray of distances from one person index to every
+    person, saturating at UNREACHABLE.
+    """
+    movies_of, stars_of = graph.movies_of, graph.stars_of
+    distances = bytearray([UNREACHABLE]) * len(graph.person_ids)
+    seen_movies = bytearray(len(graph.movie_ids))
+    distances[source] = 0
+    frontier, distance = [source], 0
+    while frontier and distance < UNREACHABLE - 1:
+        distance += 1
+        next_frontier = []
+        for person in frontier:
+            for movie in movies_of(person):
+                if seen_movies[movie]:
+                    continue
+                seen_movies[movie] = 1
+                for neighbor in stars_of(movie):
+                    if distances[neighbor] == UNREACHABLE:
+                        distances[neighbor] = distance
+                        next_frontier.append(neighbor)
+        frontier = next_frontier
+    return distances
+
+
+def build_index(graph, count):
+    """
+    Chooses `count` landmarks and computes their distances.
+
+    The first landmark is the person in the most movies; each later one
+    is the reachable person farthest from every landmark so far.
+    """
+    people = len(graph.person_ids)
+    if people == 0 or count <= 0:
+        return LandmarkIndex([], bytearray())
+    offsets = graph.person_offsets
+    first = max(range(people), key=lambda person: offsets[person + 1] - offsets[person])
+
+    landmarks, rows = [first], [distances_from(graph, first)]
+    closest = bytearray(rows[0])
+    while len(landmarks) < count:
+        candidate, farthest = None, 0
+        for person, distance in enumerate(closest):
+            if farthest < distance < UNREACHABLE:
+                candidate, farthest = person, distance
+        if candidate is None:
+            break
+        landmarks.append(candidate)
+        rows.append(distances_from(graph, candidate))
+        closest = bytearray(map(min, closest, rows[-1]))
+    return LandmarkIndex(landmarks, b"".join(rows))
+
+
+def save_index(index, graph, directory):
+    """
+    Writes a landmark index to `directory`.
+    """
+    header = {
+        "sources": snapshot.source_stats(directory),
+        "landmarks": [graph.person_ids[person] for person in index.landmarks],
+        "indices": list(index.landmarks),
+    }
+    cachefile.write_file(os.path.join(directory, FILENAME), MAGIC, VERSION, header,
+                         {"distances": index.distances})
+
+
+def load_index(graph, directory):
+    """
+    Memory-maps the landmark index in `directory`.
+
+    Returns None if there is no index, or it is stale or from another version.
+    """
+    saved = cachefile.read_file(os.path.join(directory, FILENAME), MAGIC, VERSION)
+    if saved is None:
+        return None
+    header, sections = saved
+    try:
+        if header["sources"] != snapshot.source_stats(directory):
+            return None
+    except OSError:
+        return None
+    # Checking the stored indices against the ids saves building the
+    # graph's whole person_index at startup
+    landmarks = header.get("indices", [])
+    if [graph.person_ids[person] if 0 <= person < len(graph.person_ids) else None
+            for person in landmarks] != header["landmarks"]:
+        landmarks = [graph.person_index(person_id) for person_id in header["landmarks"]]
+    distances = sections["distances"]
+    if len(distances) != len(landmarks) * len(graph.person_ids):
+        return None
+    return LandmarkIndex(landmarks, distances)
+
+
+def lower_bound(rows, target_distances, person):
+    """
+    Returns a lower bound on the distance from `person` to the target,
+    or None if some landmark proves they are not connected.
+    """
+    bound = 0
+    for row, target_distance in zip(rows, target_distances):
+        distance = row[person]
+        if distance == UNREACHABLE or target_distance == UNREACHABLE:
+            if distance != target_distance:
+                return None
+            continue
+        bound = max(bound, abs(distance - target_distance))
+    return bound
+
+
+def search(graph, index, source, target, stats=None):
+    """
+    A* search between two person indices, guided by landmark bounds.
+
+    Returns a list of (movie, person) index pairs, or None if not connected.
+    If given, `stats["expanded"]` is increased by the number of people expanded.
+    """
+    if graph.component(source) != graph.component(target):
+        return None
+    rows = index.rows()
+    target_distances = [row[target] for row in rows]
+    bound = lower_bound(rows, target_distances, source)
+    if bound is None:
+        return None
+
+    # Only the most informative landmarks are worth consulting for every neighbor
+    active = sorted(
+        range(len(rows)),
+        key=lambda k: -lower_bound([rows[k]], [target_distances[k]], source)
+    )[:ACTIVE_LANDMARKS]
+    rows = [rows[k] for k in active]
+    target_distances = [target_distances[k] for k in active]
+
+    movies_of, stars_of = graph.movies_of, graph.stars_of
+    parents, costs, closed = {source: None}, {source: 0}, set()
+
+    # Cost at which each movie's stars were last offered, as co-stars
+    # can never improve on a movie already expanded at a lower cost
+    movie_costs = {}
+
+    # Ties on estimated total prefer people further from the source
+    heap = [(bound, 0, source)]
+    while heap:
+        _, negative_cost, person = heapq.heappop(heap)
+        if person in closed:
+            continue
+        if person == target:
+            path = []
+            while parents[person] is not None:
+                movie, parent = parents[person]
+                path.append((movie, person))
+                person = parent
+            path.reverse()
+            return path
+        closed.add(person)
+        if stats is not None:
+            stats["expanded"] = stats.get("expanded", 0) + 1
+
+        cost = 1 - negative_cost
+        for movie in movies_of(person):
+            if movie_costs.get(movie, cost + 1) <= cost:
+                continue
+            movie_costs[movie] = cost
+            for neighbor in stars_of(movie):
+                if neighbor in closed or costs.get(neighbor, cost + 1) <= cost:
+                    continue
+                bound = lower_bound(rows, target_distances, neighbor)
+                if bound is None:
+                    continue
+                costs[neighbor] = cost
+                parents[neighbor] = (movie, person)
+                heapq.heappush(heap, (cost + bound, -cost, neighbor))
+    return None
+
+
+def shortest_path(graph, index, source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target.
+
+    If no possible path, returns None.
+    """
+    path = search(graph, index, graph.person_index(source), graph.person_index(target))
+    if path is None:
+        return None
+    return [(graph.movie_ids[movie], graph.person_ids[person]) for movie, person in path]
+
+
+def main():
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python landmarks.py directory [landmarks]")
+    directory = sys.argv[1]
+    count = int(sys.argv[2]) if len(sys.argv) == 3 else 16
+
+    print("Loading data...")
+    graph = snapshot.load_graph(directory)
+    print("Data loaded.")
+
+    index = build_index(graph, count)
+    save_index(index, graph, directory)
+    names = ", ".join(graph.person_names[person] for person in index.landmarks)
+    print(f"Saved {len(index.landmarks)} landmarks: {names}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Load generator for the degrees query server.
+
+Sends /path requests for the (source, target) pairs in a queries CSV
+file (the format batch.py reads) over several concurrent keep-alive
+connections, then reports throughput, client-side latencies and the
+server's own metrics.
+
+Usage: python loadgen.py [--host HOST] [--port PORT] [--concurrency N] [--requests N] queries
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from urllib.parse import urlencode
+
+import batch
+import server
+
+
+async def request(reader, writer, target):
+    """
+    Sends one GET request on an open connection, returning its status
+    and decoded JSON body.
+    """
+    writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode("latin-1"))
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def client(host, port, targets, latencies, statuses):
+    """
+    Sends requests for `targets` one after another on one connection.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for target in targets:
+            start = time.perf_counter()
+            status, _ = await request(reader, writer, target)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def run(host, port, queries, concurrency, count):
+    targets = [
+        "/path?" + urlencode({"source": source, "target": target})
+        for source, target in (queries[i % len(queries)] for i in range(count))
+    ]
+    latencies, statuses = [], {}
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        client(host, port, targets[i::concurrency], latencies, statuses)
+        for i in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"{count} requests over {concurrency} connections in {elapsed:.3f}s")
+    print(f"  throughput {count / elapsed:10.1f} requests/s")
+    for percent in [50, 95, 99]:
+        print(f"  p{percent:<9} {1000 * server.percentile(latencies, percent):10.2f}ms")
+    print(f"  statuses   {statuses}")
+
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        _, metrics = await request(reader, writer, "/metrics")
+    finally:
+        writer.close()
+    print("Server metrics:")
+    print(json.dumps(metrics, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate load against the degrees server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8050)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("queries")
+    args = parser.parse_args()
+    queries = [query for query in batch.read_queries(args.queries) if len(query) == 2]
+    asyncio.run(run(args.host, args.port, queries, args.concurrency, args.requests))
+
+
+if __name__ == "__main__":
+    main()
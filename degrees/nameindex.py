@@ -0,0 +1,238 @@
+"""
+Name index for finding people by partial or misspelled names.
+
+The graph's lowercase names are kept in sorted order, which behaves as
+an implicit trie: the names sharing a prefix form one contiguous range,
+and the children of a prefix are found by bisecting within it. Prefix
+search is a single range lookup, and fuzzy search walks this trie while
+tracking edit distances, pruning any prefix already too far from the query.
+
+To rank a prefix's range by movies without reading all of it, the names
+are split into blocks of BLOCK names, then blocks of BLOCK blocks, and
+so on, and the TOP people in the most movies are kept for each block.
+Any range is covered by a few whole blocks at each size plus at most a
+few loose names at its ends.
+"""
+
+import heapq
+from array import array
+from bisect import bisect_left
+from itertools import chain
+
+# How a candidate matched, best first: its whole name, the start of its
+# name, or its name within some edits
+MATCHES = ["exact", "prefix", "fuzzy"]
+
+# Names per block at each size, and people kept per block
+BLOCK = 32
+TOP = 10
+
+
+class NameIndex():
+    def __init__(self, graph):
+        self.graph = graph
+
+        # Decoded once, so every bisect compares in-memory strings
+        self.keys = list(graph.name_keys)
+        self.order = graph.name_order
+
+        # Sort key of the person at each position: most movies first,
+        # then lowest person index, as rank orders them
+        people = len(graph.person_ids)
+        offsets = graph.person_offsets
+        self.ranks = [-(offsets[person + 1] - offsets[person]) * people + person for person in self.order]
+
+        # levels[i] holds the TOP best positions of each block of
+        # BLOCK ** (i + 1) names, best first
+        self.levels = []
+        children = [[position] for position in range(len(self.keys))]
+        while len(children) >= BLOCK:
+            blocks = [heapq.nsmallest(TOP, chain.from_iterable(children[start:start + BLOCK]),
+                                      key=self.ranks.__getitem__)
+                      for start in range(0, len(children) - BLOCK + 1, BLOCK)]
+            self.levels.append(array("i", chain.from_iterable(blocks)))
+            children = blocks
+
+    def rank(self, matches, limit):
+        """
+        Returns the best `limit` candidates for (person, match, distance)
+        matches, in MATCHES order, fuzzy matches closest first, then those
+        in the most movies, as dictionaries of: person_id, name, birth,
+        movies (a count), match and distance (the edit distance).
+        """
+        graph = self.graph
+        ranked = sorted(
+            (MATCHES.index(match), distance if match == "fuzzy" else 0,
+             -len(graph.movies_of(person)), person, match, distance)
+            for person, match, distance in matches
+        )
+        return [{
+            "person_id": graph.person_ids[person],
+            "name": graph.person_names[person],
+            "birth": graph.person_births[person],
+            "movies": -negative_movies,
+            "match": match,
+            "distance": distance,
+        } for _, _, negative_movies, person, match, distance in ranked[:limit]]
+
+    def prefix(self, prefix, limit=10):
+        """
+        Returns ranked candidates whose names start with `prefix`,
+        ignoring case, those in the most movies first.
+        """
+        key = prefix.lower()
+        keys = self.keys
+        graph = self.graph
+        low = bisect_left(keys, key)
+        high = bisect_left(keys, key + "\U0010ffff", low)
+        positions = []
+
+        # Exact matches rank first and sort first in the range
+        position = low
+        while position < high and keys[position] == key:
+            positions.append(position)
+            position += 1
+        positions.extend(self.best(position, high, limit))
+
+        matches = {self.order[position]: (prefix_match(keys[position], key), len(keys[position]) - len(key))
+                   for position in positions}
+
+        # People given movies since the index was built may now outrank
+        # those chosen above, and people added since are not in it
+        for person in graph.extra_movies:
+            if person < len(self.ranks) and graph.person_names[person].lower().startswith(key):
+                name = graph.person_names[person].lower()
+                matches[person] = (prefix_match(name, key), len(name) - len(key))
+        for name, people in graph.extra_names.items():
+            if name.startswith(key):
+                matches.update((person, (prefix_match(name, key), len(name) - len(key))) for person in people)
+        return self.rank([(person, match, distance) for person, (match, distance) in matches.items()], limit)
+
+    def best(self, low, high, limit):
+        """
+        Returns the positions of the `limit` people in the most movies
+        when the index was built, among names at positions low to high.
+        """
+        ranks = self.ranks
+        if limit > TOP:
+            return heapq.nsmallest(limit, range(low, high), key=ranks.__getitem__)
+        candidates = []
+        position = low
+        while position < high:
+            # The largest block starting here that fits in the range
+            level, size = -1, 1
+            while (level + 1 < len(self.levels) and position % (size * BLOCK) == 0
+                   and position + size * BLOCK <= high):
+                level, size = level + 1, size * BLOCK
+            if level < 0:
+                candidates.append(position)
+            else:
+                block = position // size * TOP
+                candidates.extend(self.levels[level][block:block + TOP])
+            position += size
+        return heapq.nsmallest(limit, candidates, key=ranks.__getitem__)
+
+    def fuzzy(self, name, max_distance=2, limit=10, prefix_length=1):
+        """
+        Returns ranked candidates whose names are within `max_distance`
+        edits (insertions, deletions or substitutions) of `name`,
+        ignoring case. The first `prefix_length` characters must match
+        exactly, as typos there are rare and matching them prunes most
+        of the search.
+        """
+        query = name.lower()
+        keys = self.keys
+        matches = []
+        anchor = query[:prefix_length]
+        low = bisect_left(keys, anchor)
+        high = bisect_left(keys, anchor + "\U0010ffff", low)
+
+        # Each entry is a prefix, the range of names sharing it, and the
+        # edit distances from it to every prefix of the query. Only a band
+        # of max_distance either side of the diagonal can stay in range,
+        # so cells outside it are left at max_distance + 1. The anchor is
+        # the query's own prefix, so it is |i - len(anchor)| edits from
+        # the query's prefix of length i.
+        outside = max_distance + 1
+        first_row = [abs(i - len(anchor)) for i in range(len(query) + 1)]
+        first_row = [distance if distance <= max_distance else outside for distance in first_row]
+        stack = [(anchor, low, high, first_row)]
+        while stack:
+            prefix, low, high, row = stack.pop()
+            depth = len(prefix)
+            position = low
+
+            # Names equal to the prefix itself sort first in its range
+            while position < high and len(keys[position]) == depth:
+                if row[-1] <= max_distance:
+                    matches.append((self.order[position], fuzzy_match(row[-1]), row[-1]))
+                position += 1
+
+            first = max(1, depth + 1 - max_distance)
+            last = min(len(query), depth + 1 + max_distance)
+            while position < high:
+                character = keys[position][depth]
+                end = bisect_left(keys, prefix + chr(ord(character) + 1), position, high)
+                next_row = [outside] * (len(query) + 1)
+                if depth + 1 <= max_distance:
+                    next_row[0] = depth + 1
+                best = next_row[0]
+                for i in range(first, last + 1):
+                    distance = min(
+                        next_row[i - 1] + 1,
+                        row[i] + 1,
+                        row[i - 1] + (query[i - 1] != character)
+                    )
+                    if distance < outside:
+                        next_row[i] = distance
+                        if distance < best:
+                            best = distance
+                if best <= max_distance:
+                    stack.append((prefix + character, position, end, next_row))
+                position = end
+
+        for extra_name, people in self.graph.extra_names.items():
+            if not extra_name.startswith(anchor):
+                continue
+            distance = edit_distance(query, extra_name)
+            if distance <= max_distance:
+                matches.extend((person, fuzzy_match(distance), distance) for person in people)
+        return self.rank(matches, limit)
+
+    def search(self, name, limit=10, max_distance=1):
+        """
+        Returns ranked candidates for a name as typed so far: exact and
+        prefix matches, topped up with fuzzy matches.
+        """
+        candidates = self.prefix(name, limit)
+        if len(candidates) < limit:
+            seen = {candidate["person_id"] for candidate in candidates}
+            for candidate in self.fuzzy(name, max_distance, limit):
+                if candidate["person_id"] not in seen:
+                    candidates.append(candidate)
+        return candidates[:limit]
+
+
+def prefix_match(name, prefix):
+    return "exact" if name == prefix else "prefix"
+
+
+def fuzzy_match(distance):
+    return "exact" if distance == 0 else "fuzzy"
+
+
+def edit_distance(first, second):
+    """
+    Returns the Levenshtein distance between two strings.
+    """
+    row = list(range(len(second) + 1))
+    for i, first_character in enumerate(first, start=1):
+        next_row = [i]
+        for j, second_character in enumerate(second, start=1):
+            next_row.append(min(
+                next_row[j - 1] + 1,
+                row[j] + 1,
+                row[j - 1] + (first_character != second_character)
+            ))
+        row = next_row
+    return row[-1]
@@ -0,0 +1,134 @@
+import random
+import unittest
+
+import csr
+from nameindex import NameIndex, edit_distance
+
+
+def random_graph(count, seed=0):
+    """
+    Returns a graph of `count` people with short random names, sharing
+    first names and surnames so that many names are a few edits apart.
+    """
+    rng = random.Random(seed)
+    letters = "abcdekn"
+    first_names = ["".join(rng.choice(letters) for _ in range(rng.randint(1, 5))) for _ in range(30)]
+    surnames = ["".join(rng.choice(letters) for _ in range(rng.randint(2, 6))) for _ in range(30)]
+    names = ["Kevin Bacon", "Kevin Bacon", "Jon Cruise", "Tom Cruise", "Kevin Baxo"]
+    while len(names) < count:
+        names.append(f"{rng.choice(first_names).title()} {rng.choice(surnames).title()}")
+    return csr.build_graph([str(i) for i in range(count)], names, [""] * count, [], [], [], [])
+
+
+def graph_with_movies(names, movie_counts):
+    """
+    Returns a graph of people with the given names, each in its own
+    number of movies.
+    """
+    movie_count = max(movie_counts, default=0)
+    edges = [person * movie_count + movie
+             for person, count in enumerate(movie_counts) for movie in range(count)]
+    return csr.build_graph([str(i) for i in range(len(names))], names, [""] * len(names),
+                           [str(i) for i in range(movie_count)], [""] * movie_count, [""] * movie_count, edges)
+
+
+def brute_force(graph, name):
+    """
+    Returns a function giving the {person_id: distance} matches for
+    `name`, for a maximum distance and prefix length, found by comparing
+    it with every name.
+    """
+    query = name.lower()
+    distances = [(person_id, person_name.lower(), edit_distance(query, person_name.lower()))
+                 for person_id, person_name in zip(graph.person_ids, graph.person_names)]
+
+    def matches(max_distance, prefix_length):
+        return {person_id: distance for person_id, key, distance in distances
+                if distance <= max_distance and key.startswith(query[:prefix_length])}
+    return matches
+
+
+class TestFuzzy(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = random_graph(1000)
+        self.index = NameIndex(self.graph)
+
+    def fuzzy(self, name, max_distance, prefix_length):
+        candidates = self.index.fuzzy(name, max_distance, limit=len(self.graph.person_ids),
+                                      prefix_length=prefix_length)
+        return {candidate["person_id"]: candidate["distance"] for candidate in candidates}
+
+    def test_fuzzy_typo_at_start(self):
+        self.assertEqual({"0": 1, "1": 1}, self.fuzzy("Kkevin Bacon", 1, 1))
+        self.assertEqual({"0": 1, "1": 1}, self.fuzzy("kevvin bacon", 1, 3))
+        self.assertEqual({"0": 1, "1": 1}, self.fuzzy("xkevin bacon", 1, 0))
+
+    def test_fuzzy_distance(self):
+        self.assertEqual(1, self.fuzzy("joon cruise", 2, 1)["2"])
+
+    def test_fuzzy_matches_brute_force(self):
+        rng = random.Random(1)
+        for _ in range(200):
+            name = rng.choice(self.graph.person_names)
+            typo = list(name)
+            for _ in range(rng.randint(0, 2)):
+                position = rng.randrange(len(typo) + 1)
+                edit = rng.choice(["insert", "delete", "substitute"])
+                if edit == "insert":
+                    typo.insert(position, rng.choice("abcdekn"))
+                elif position < len(typo):
+                    if edit == "delete":
+                        del typo[position]
+                    else:
+                        typo[position] = rng.choice("abcdekn")
+            typo = "".join(typo)
+            expected = brute_force(self.graph, typo)
+            for max_distance in [1, 2]:
+                for prefix_length in [0, 1, 2, 3]:
+                    self.assertEqual(expected(max_distance, prefix_length),
+                                     self.fuzzy(typo, max_distance, prefix_length), (typo, max_distance, prefix_length))
+
+
+class TestSearch(unittest.TestCase):
+
+    def test_prefix_before_fuzzy(self):
+        index = NameIndex(random_graph(5))
+        candidates = index.search("Kevin Baco", limit=10, max_distance=1)
+        self.assertEqual(["prefix", "prefix", "fuzzy"], [candidate["match"] for candidate in candidates])
+        self.assertEqual(["Kevin Bacon", "Kevin Bacon", "Kevin Baxo"], [candidate["name"] for candidate in candidates])
+        self.assertEqual([1, 1, 1], [candidate["distance"] for candidate in candidates])
+
+    def test_prefix_ranks_whole_range(self):
+        names = [f"Kevin A{i:03}" for i in range(300)] + ["Kevin Bacon"]
+        index = NameIndex(graph_with_movies(names, [1] * 300 + [50]))
+        candidates = index.search("kevin", limit=5)
+        self.assertEqual("Kevin Bacon", candidates[0]["name"])
+        self.assertEqual(50, candidates[0]["movies"])
+
+        # Movies added after the index was built count too
+        index.graph.apply(movie_rows=[{"id": "new", "title": "", "year": ""}],
+                          star_rows=[{"person_id": "7", "movie_id": str(movie)} for movie in range(50)]
+                          + [{"person_id": "7", "movie_id": "new"}])
+        self.assertEqual(["Kevin A007", "Kevin Bacon"], [candidate["name"] for candidate in index.search("kevin", 2)])
+
+    def test_prefix_matches_brute_force(self):
+        rng = random.Random(2)
+        graph = random_graph(3000)
+        movie_counts = [rng.choice([0, 1, 1, 2, 3, 5, 8]) for _ in graph.person_ids]
+        graph = graph_with_movies(list(graph.person_names), movie_counts)
+        index = NameIndex(graph)
+        keys = [name.lower() for name in graph.person_names]
+        for name in rng.sample(keys, 50):
+            for length in range(len(name) + 1):
+                prefix = name[:length]
+                for limit in [1, 10, 25]:
+                    expected = sorted((key != prefix, -movie_counts[person], person)
+                                      for person, key in enumerate(keys) if key.startswith(prefix))
+                    candidates = index.prefix(prefix, limit)
+                    self.assertEqual([str(person) for _, _, person in expected[:limit]],
+                                     [candidate["person_id"] for candidate in candidates], (prefix, limit))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,290 @@
+"""
+Long-lived degrees query server.
+
+Loads the graph once, then answers JSON queries over HTTP:
+
+    GET /path?source=...&target=...   shortest path between two people
+    GET /neighbors?person=...         people who starred with a person
+    GET /names?q=...&limit=...        people whose names match as typed
+    GET /metrics                      request counts, latencies and cache counters
+
+People may be given by IMDB id or by name. Searches that finish within
+a small number of expanded people are answered on the event loop; any
+larger search is handed to a pool of worker processes that share the
+loaded graph, so small queries are never stuck behind large ones. The
+breadth-first trees of people queried often are built in the pool too,
+and added to the path cache here once they arrive. With --landmarks,
+searches in the pool use A* over the dataset's landmark index, built
+beforehand with landmarks.py.
+
+Usage: python server.py [--host HOST] [--port PORT] [--workers N] [--inline-limit N] [--landmarks] directory
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import sys
+import time
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import batch
+import csr
+import degrees
+import nameindex
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           500: "Internal Server Error"}
+
+
+class Metrics():
+    def __init__(self, window=10000):
+        self.counts = Counter()
+        self.errors = Counter()
+        self.offloaded = 0
+
+        # Latencies in seconds of the most recent `window` requests per endpoint
+        self.latencies = defaultdict(lambda: deque(maxlen=window))
+
+    def record(self, endpoint, seconds, status):
+        self.counts[endpoint] += 1
+        if status != 200:
+            self.errors[endpoint] += 1
+        self.latencies[endpoint].append(seconds)
+
+    def summary(self):
+        """
+        Returns request counts, errors and latency percentiles in
+        milliseconds for each endpoint.
+        """
+        endpoints = {}
+        for endpoint, count in self.counts.items():
+            latencies = sorted(self.latencies[endpoint])
+            endpoints[endpoint] = {
+                "requests": count,
+                "errors": self.errors[endpoint],
+                "mean_ms": 1000 * sum(latencies) / len(latencies),
+                "p50_ms": 1000 * percentile(latencies, 50),
+                "p95_ms": 1000 * percentile(latencies, 95),
+                "p99_ms": 1000 * percentile(latencies, 99),
+                "max_ms": 1000 * latencies[-1],
+            }
+        return {"endpoints": endpoints, "offloaded_searches": self.offloaded,
+                "cache": degrees.path_cache.stats()}
+
+
+def percentile(values, percent):
+    """
+    Returns the nearest-rank percentile of sorted, non-empty `values`.
+    """
+    rank = max(1, -(-percent * len(values) // 100))
+    return values[int(rank) - 1]
+
+
+def search_task(source_id, target_id):
+    """
+    Runs one search in a worker process.
+    """
+    return degrees.shortest_path(source_id, target_id)
+
+
+def tree_task(person_id):
+    """
+    Builds one person's breadth-first tree in a worker process.
+    """
+    graph = degrees.csr_graph
+    return csr.bfs_tree(graph, graph.person_index(person_id))
+
+
+class Server():
+    def __init__(self, pool, inline_limit):
+        self.pool = pool
+        self.inline_limit = inline_limit
+        self.metrics = Metrics()
+
+        # Tree builds in progress, by person index
+        self.building = {}
+        self.endpoints = {
+            "/path": self.path,
+            "/neighbors": self.neighbors,
+            "/names": self.names,
+            "/metrics": self.report,
+        }
+
+    async def path(self, params):
+        source, target = param(params, "source"), param(params, "target")
+        source_id = batch.resolve(source, "first")
+        target_id = batch.resolve(target, "first")
+        if source_id is None or target_id is None:
+            return 404, batch.result((source, target), error="Person not found.")
+
+        graph = degrees.csr_graph
+        source_index, target_index = graph.person_index(source_id), graph.person_index(target_id)
+
+        # Building a hot person's tree would hold up the event loop
+        found, path = degrees.path_cache.lookup(graph, source_index, target_index, build=False)
+        for person in degrees.path_cache.hot_people(source_index, target_index):
+            if person not in self.building:
+                self.building[person] = asyncio.create_task(self.build_tree(graph, person))
+        if not found:
+            try:
+                path = csr.search(graph, source_index, target_index, limit=self.inline_limit)
+            except csr.SearchLimitExceeded:
+                self.metrics.offloaded += 1
+                loop = asyncio.get_running_loop()
+                path = await loop.run_in_executor(self.pool, search_task, source_id, target_id)
+                if path is not None:
+                    path = [(graph.movie_index(movie_id), graph.person_index(person_id))
+                            for movie_id, person_id in path]
+            degrees.path_cache.store(graph, source_index, target_index, path)
+        if path is not None:
+            path = [(graph.movie_ids[movie], graph.person_ids[person]) for movie, person in path]
+        return 200, batch.result((source, target), source_id, target_id, path)
+
+    async def build_tree(self, graph, person):
+        """
+        Builds a hot person's tree in the pool, and caches it if the
+        graph has not changed meanwhile.
+        """
+        version = graph.version
+        loop = asyncio.get_running_loop()
+        try:
+            tree = await loop.run_in_executor(self.pool, tree_task, graph.person_ids[person])
+        except Exception:
+            # The person just goes without a tree, as if never hot
+            return
+        finally:
+            del self.building[person]
+        if degrees.csr_graph is graph and graph.version == version:
+            degrees.path_cache.check(graph)
+            degrees.path_cache.add_tree(person, tree)
+
+    async def neighbors(self, params):
+        person = param(params, "person")
+        person_id = batch.resolve(person, "first")
+        if person_id is None:
+            return 404, {"person": person, "error": "Person not found."}
+        neighbors = sorted(degrees.neighbors_for_person(person_id))
+        return 200, {"person": person_id, "neighbors": neighbors}
+
+    async def names(self, params):
+        limit = int(params.get("limit", ["10"])[0])
+        return 200, {"candidates": degrees.candidates_for_name(param(params, "q"), limit)}
+
+    async def report(self, params):
+        return 200, self.metrics.summary()
+
+    async def dispatch(self, method, target):
+        """
+        Answers one request, returning its status and JSON payload.
+        """
+        url = urlsplit(target)
+        handler = self.endpoints.get(url.path)
+        start = time.perf_counter()
+        if handler is None:
+            status, payload = 404, {"error": f"No endpoint {url.path}."}
+        elif method != "GET":
+            status, payload = 405, {"error": "Only GET is supported."}
+        else:
+            try:
+                status, payload = await handler(parse_qs(url.query))
+            except (KeyError, ValueError) as error:
+                status, payload = 400, {"error": str(error.args[0]) if error.args else repr(error)}
+            except Exception as error:
+                status, payload = 500, {"error": repr(error)}
+        if handler is not None:
+            self.metrics.record(url.path, time.perf_counter() - start, status)
+        return status, payload
+
+    async def handle_connection(self, reader, writer):
+        """
+        Serves HTTP/1.1 requests on one connection until it is closed.
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    status, payload, version = 400, {"error": "Malformed request line."}, "HTTP/1.0"
+                else:
+                    status, payload = await self.dispatch(method, target)
+
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                body = json.dumps(payload).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + body
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+def param(params, name):
+    """
+    Returns a required query string parameter.
+    """
+    if name not in params:
+        raise KeyError(f"Missing parameter '{name}'.")
+    return params[name][0]
+
+
+async def serve(host, port, pool, inline_limit):
+    server = Server(pool, inline_limit)
+    listener = await asyncio.start_server(server.handle_connection, host, port)
+    print(f"Serving on http://{host}:{port}", file=sys.stderr)
+    async with listener:
+        await listener.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve degrees queries over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8050)
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(),
+                        help="processes for large searches")
+    parser.add_argument("--inline-limit", type=int, default=2000,
+                        help="most people a search may expand on the event loop")
+    parser.add_argument("--landmarks", action="store_true",
+                        help="search the pool's queries with the landmark index")
+    parser.add_argument("directory")
+    args = parser.parse_args()
+
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(args.directory, args.landmarks)
+    degrees.name_index = nameindex.NameIndex(degrees.csr_graph)
+    print("Data loaded.", file=sys.stderr)
+
+    # Workers are forked from the loaded process where possible, sharing its graph
+    method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+    pool = ProcessPoolExecutor(args.workers, mp_context=multiprocessing.get_context(method),
+                               initializer=batch.init_worker, initargs=(args.directory, args.landmarks))
+    try:
+        asyncio.run(serve(args.host, args.port, pool, args.inline_limit))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+if __name__ == "__main__":
+    main()
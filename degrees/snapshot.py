@@ -0,0 +1,139 @@
+"""
+Versioned binary snapshot of a compact degrees graph.
+
+The snapshot is written next to the CSV files, and records the size and
+modification time of each CSV file it was built from, so it is rebuilt
+whenever the CSVs change. Later runs memory-map the snapshot: integer
+arrays are used in place, and strings are decoded only when accessed.
+"""
+
+import os
+from array import array
+
+import cachefile
+import csr
+
+MAGIC = b"DEGSNAP\0"
+VERSION = 4
+FILENAME = "degrees.snapshot"
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+INT_FIELDS = ("person_offsets", "person_movies", "movie_offsets", "movie_stars",
+              "name_order", "components", "person_id_order", "movie_id_order")
+STRING_FIELDS = ("person_ids", "person_names", "person_births",
+                 "movie_ids", "movie_titles", "movie_years", "name_keys",
+                 "person_id_keys", "movie_id_keys")
+
+
+class StringTable():
+    """
+    Sequence of strings stored as UTF-8 in a shared buffer, decoded on
+    access. Strings appended later are kept in an ordinary list.
+    """
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+        self.extra = []
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("string table index out of range")
+        if index >= len(self.offsets) - 1:
+            return self.extra[index - len(self.offsets) + 1]
+        return str(self.blob[self.offsets[index]:self.offsets[index + 1]], "utf-8")
+
+    def __len__(self):
+        return len(self.offsets) - 1 + len(self.extra)
+
+    def __iter__(self):
+        offsets, blob = self.offsets, self.blob
+        for i in range(len(offsets) - 1):
+            yield str(blob[offsets[i]:offsets[i + 1]], "utf-8")
+        yield from self.extra
+
+    def append(self, value):
+        self.extra.append(value)
+
+
+def snapshot_path(directory):
+    return os.path.join(directory, FILENAME)
+
+
+def source_stats(directory):
+    """
+    Returns the size and modification time of each CSV file.
+    """
+    stats = {}
+    for filename in SOURCES:
+        stat = os.stat(os.path.join(directory, filename))
+        stats[filename] = [stat.st_size, stat.st_mtime_ns]
+    return stats
+
+
+def load_graph(directory):
+    """
+    Returns the graph for `directory`, from its snapshot when current,
+    otherwise parsing the CSV files and writing a fresh snapshot.
+    """
+    graph = load_snapshot(directory)
+    if graph is None:
+        sources = source_stats(directory)
+        graph = csr.load_graph(directory)
+        graph.sources = sources
+        try:
+            save_snapshot(graph, directory)
+        except OSError:
+            # Caching is best effort, e.g. on a read-only dataset
+            pass
+    return graph
+
+
+def save_snapshot(graph, directory):
+    """
+    Writes `graph` to a snapshot file in `directory`, recording the CSV
+    files it reflects (by default, their current state).
+    """
+    if graph.version:
+        graph = graph.compact()
+    sections = {}
+    for field in INT_FIELDS:
+        sections[field] = getattr(graph, field)
+    for field in STRING_FIELDS:
+        encoded = [value.encode("utf-8") for value in getattr(graph, field)]
+        offsets = array("q", [0])
+        for value in encoded:
+            offsets.append(offsets[-1] + len(value))
+        sections[f"{field}_offsets"] = offsets
+        sections[field] = b"".join(encoded)
+
+    sources = graph.sources or source_stats(directory)
+    cachefile.write_file(snapshot_path(directory), MAGIC, VERSION, {"sources": sources}, sections)
+
+
+def load_snapshot(directory):
+    """
+    Memory-maps the snapshot in `directory` into a graph.
+
+    Returns None if there is no snapshot, or it is stale or from
+    another version.
+    """
+    saved = cachefile.read_file(snapshot_path(directory), MAGIC, VERSION)
+    if saved is None:
+        return None
+    header, sections = saved
+    try:
+        if header["sources"] != source_stats(directory):
+            return None
+    except OSError:
+        return None
+
+    fields = {}
+    for field in INT_FIELDS:
+        fields[field] = sections[field].cast("i")
+    for field in STRING_FIELDS:
+        fields[field] = StringTable(sections[f"{field}_offsets"].cast("q"), sections[field])
+    graph = csr.Graph(**fields)
+    graph.sources = header["sources"]
+    return graph
@@ -1,3 +1,8 @@
+import heapq
+from collections import deque
+from itertools import count
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -7,13 +12,17 @@ class Node():
 
 class StackFrontier():
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+
+        # Number of nodes in the frontier with each state
+        self.states = {}
 
     def add(self, node):
         self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
@@ -22,17 +31,38 @@ class StackFrontier():
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.pop()
+            if self.states[node.state] == 1:
+                del self.states[node.state]
+            else:
+                self.states[node.state] -= 1
             return node
 
+    def pop(self):
+        return self.frontier.pop()
+
 
 class QueueFrontier(StackFrontier):
 
-    def remove(self):
-        if self.empty():
-            raise Exception("empty frontier")
-        else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
-            return node
+    def pop(self):
+        return self.frontier.popleft()
+
+
+class PriorityFrontier(StackFrontier):
+    """
+    Removes the node with the lowest `priority(node)` first, and
+    among equal priorities the one added first.
+    """
+
+    def __init__(self, priority):
+        super().__init__()
+        self.frontier = []
+        self.priority = priority
+        self.order = count()
+
+    def add(self, node):
+        heapq.heappush(self.frontier, (self.priority(node), next(self.order), node))
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+
+    def pop(self):
+        return heapq.heappop(self.frontier)[2]
@@ -0,0 +1,209 @@
+"""
+Benchmarks for the PageRank engines, on synthetic corpora.
+
+Usage: python benchmark.py [pages] [changes]
+       python benchmark.py outofcore [links] [block]
+       python benchmark.py solvers [corpus ...]
+"""
+
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import incremental
+import matrix
+import outofcore
+import solvers
+from pagerank import DAMPING, crawl
+
+
+def synthetic_corpus(pages, links=5, local=0.0, seed=0):
+    """
+    Returns a random corpus of `pages` pages with about `links` links
+    each, some pages having none. A fraction `local` of links go to one
+    of the 100 pages either side, like links within a site.
+    """
+    rng = random.Random(seed)
+    names = [f"{i}.html" for i in range(pages)]
+    corpus = {}
+    for i, name in enumerate(names):
+        count = 0 if rng.random() < 0.1 else rng.randint(1, 2 * links - 1)
+        targets = [
+            (i + rng.randint(-100, 100)) % pages if rng.random() < local else rng.randrange(pages)
+            for _ in range(count)
+        ]
+        corpus[name] = set(names[j] for j in targets) - {name}
+    return corpus
+
+
+def random_changes(corpus, changes, seed=1):
+    """
+    Returns `changes` links to add and as many existing links to remove.
+    """
+    rng = random.Random(seed)
+    names = list(corpus)
+    added = [(rng.choice(names), rng.choice(names)) for _ in range(changes)]
+    linked = [name for name in names if corpus[name]]
+    removed = []
+    for name in rng.sample(linked, changes):
+        removed.append((name, rng.choice(sorted(corpus[name]))))
+    return added, removed
+
+
+def benchmark_updates(pages, changes, local):
+    """
+    Compares re-ranking from scratch with warm-started power iteration
+    and push updates after a few links change, measuring the L1 error
+    against ranks converged much more tightly.
+    """
+    corpus = synthetic_corpus(pages, local=local)
+    ranks = matrix.matrix_pagerank(corpus, DAMPING, tolerance=1e-12)
+    added, removed = random_changes(corpus, changes)
+    changed = {page: set(links) for page, links in corpus.items()}
+    incremental.apply_link_changes(changed, added, removed)
+    exact = matrix.matrix_pagerank(changed, DAMPING, tolerance=1e-13)
+    print(f"Re-ranking {pages} pages ({local:.0%} local links) "
+          f"after {changes} links added and {changes} removed")
+
+    def report(name, steps, unit, elapsed, updated):
+        error = sum(abs(updated[page] - exact[page]) for page in exact)
+        print(f"  {name:<20} {steps:>8} {unit:<10} {elapsed:8.3f}s  L1 error {error:.2e}")
+
+    start = time.perf_counter()
+    links = matrix.LinkMatrix(changed)
+    vector, iterations = matrix.power_iteration(links, DAMPING)
+    report("cold start", iterations, "iterations", time.perf_counter() - start, links.ranks(vector))
+
+    for name, reuse, push in [("warm, new matrix", False, False),
+                              ("warm, updated matrix", True, False),
+                              ("push", False, True)]:
+        corpus_copy = {page: set(links) for page, links in corpus.items()}
+        links = matrix.LinkMatrix(corpus_copy) if reuse else None
+        start = time.perf_counter()
+        updated, steps = incremental.update_pagerank(corpus_copy, ranks, DAMPING, added, removed,
+                                                     links=links, push=push)
+        report(name, steps, "pushes" if push else "iterations", time.perf_counter() - start, updated)
+
+
+def benchmark_personalized(pages, count):
+    """
+    Compares solving `count` personalized PageRank vectors together
+    with solving them one at a time.
+    """
+    corpus = synthetic_corpus(pages)
+    links = matrix.LinkMatrix(corpus)
+    rng = random.Random(2)
+    topics = [rng.sample(links.pages, 10) for _ in range(count)]
+    teleports = matrix.teleport_matrix(links, topics)
+    print(f"Personalized PageRank for {count} topics over {pages} pages")
+
+    start = time.perf_counter()
+    separate = [matrix.personalized_pagerank(links, teleports[:, [i]], DAMPING)[0] for i in range(count)]
+    elapsed = time.perf_counter() - start
+    print(f"  {'one at a time':<20} {elapsed:8.3f}s")
+
+    start = time.perf_counter()
+    batched, iterations = matrix.personalized_pagerank(links, teleports, DAMPING)
+    elapsed = time.perf_counter() - start
+    error = max(abs(batched[:, i] - separate[i][:, 0]).sum() for i in range(count))
+    print(f"  {'batched':<20} {elapsed:8.3f}s  {iterations} iterations, "
+          f"{batched.nbytes / 2**20:.1f} MiB, largest L1 difference {error:.2e}")
+
+
+def synthetic_blocks(pages, links_per_page=5, block=outofcore.BLOCK, seed=0):
+    """
+    Generates (sources, targets) blocks of a random graph, sorted by
+    source page, for outofcore.write_graph, with about `block` links
+    in each and a tenth of pages having no links.
+    """
+    rng = np.random.default_rng(seed)
+    step = max(1, block // links_per_page)
+    for start in range(0, pages, step):
+        count = min(step, pages - start)
+        out_degrees = rng.integers(1, 2 * links_per_page, size=count)
+        out_degrees[rng.random(count) < 0.1] = 0
+        sources = np.repeat(np.arange(start, start + count), out_degrees)
+        yield sources, rng.integers(0, pages, size=len(sources))
+
+
+def rank_on_disk(directory, block):
+    """
+    Ranks a graph on disk, returning the iterations, seconds and this
+    process's peak resident memory in bytes.
+    """
+    start = time.perf_counter()
+    _, iterations = outofcore.out_of_core_pagerank(directory, DAMPING, block=block)
+    elapsed = time.perf_counter() - start
+    return iterations, elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def benchmark_out_of_core(links, block):
+    """
+    Writes a synthetic graph with about `links` links to a temporary
+    directory and ranks it out of core, in a fresh process so that its
+    peak memory reflects the ranking alone.
+    """
+    pages = links // 5
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        outofcore.write_graph(directory, pages, synthetic_blocks(pages, block=block))
+        elapsed = time.perf_counter() - start
+        on_disk = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+        print(f"Out-of-core PageRank over {pages} pages, {on_disk / 2**20:.0f} MiB of links")
+        print(f"  {'write graph':<20} {elapsed:8.3f}s")
+
+        with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            iterations, elapsed, peak = pool.submit(rank_on_disk, directory, block).result()
+        print(f"  {'rank':<20} {elapsed:8.3f}s  {iterations} iterations, block of {block} links, "
+              f"peak RSS {peak / 2**20:.0f} MiB (rank vectors {2 * 8 * pages / 2**20:.0f} MiB mapped)")
+
+
+def benchmark_solvers(corpora, tolerance=1e-8):
+    """
+    Prints a table of the iterations and time each solver takes to
+    reach `tolerance` on each named corpus, and its L1 error against
+    ranks converged much more tightly.
+    """
+    print(f"Solvers to an L1 residual of {tolerance:g}")
+    print(f"  {'corpus':<24} {'solver':<14} {'iterations':>10} {'time':>10} {'L1 error':>10}")
+    for name, corpus in corpora:
+        links = matrix.LinkMatrix(corpus)
+        exact, _ = matrix.power_iteration(links, DAMPING, tolerance=1e-14)
+        for method in solvers.SOLVERS:
+            ranks, convergence = solvers.solve(links, DAMPING, method, tolerance)
+            error = np.abs(ranks - exact).sum()
+            print(f"  {name:<24} {method:<14} {convergence.iterations:>10} "
+                  f"{convergence.elapsed:9.3f}s {error:10.2e}")
+
+
+def main():
+    if sys.argv[1:2] == ["solvers"]:
+        corpora = [(os.path.basename(os.path.normpath(directory)), crawl(directory, cache=False))
+                   for directory in sys.argv[2:]]
+        corpora.append(("synthetic 200k", synthetic_corpus(200000)))
+        corpora.append(("synthetic 200k, local", synthetic_corpus(200000, local=0.99)))
+        benchmark_solvers(corpora)
+        return
+    if sys.argv[1:2] == ["outofcore"]:
+        links = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000_000
+        block = int(sys.argv[3]) if len(sys.argv) > 3 else outofcore.BLOCK
+        benchmark_out_of_core(links, block)
+        return
+    if len(sys.argv) > 3:
+        sys.exit("Usage: python benchmark.py [pages] [changes]")
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    changes = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    for local in [0.0, 0.99]:
+        benchmark_updates(pages, changes, local)
+    benchmark_personalized(pages, 100)
+
+
+if __name__ == "__main__":
+    main()
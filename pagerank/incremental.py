@@ -0,0 +1,102 @@
+"""
+Re-ranking a corpus after a few of its links change.
+
+Rather than starting again from equal ranks, the ranks from before the
+change are used as the starting point, either for power iteration over
+the whole corpus, with its link matrix corrected rather than rebuilt,
+or for push updates that only visit the pages the change reaches.
+
+Push updates rely on PageRank being the solution y of
+
+    y = damping * links @ y + 1
+
+scaled to sum to 1, where pages without links pass nothing on: the
+share they would spread evenly is the same for every page, so it only
+changes the scale of y. Scaling the old ranks to fit this equation
+leaves a residual only around the pages whose links changed, and each
+push moves one page's residual into its rank and passes the damped
+remainder on to the pages it links to, until every residual is small.
+"""
+
+from collections import deque
+
+import matrix
+
+
+def apply_link_changes(corpus, added=(), removed=()):
+    """
+    Adds and removes (page, link) pairs in `corpus`, ignoring links from
+    a page to itself, and returns the previous links of every page
+    whose links changed.
+    """
+    previous = {}
+    for changes, change in [(removed, set.discard), (added, set.add)]:
+        for page, link in changes:
+            if page not in corpus or link not in corpus:
+                raise KeyError(f"No page {page if page not in corpus else link} in corpus.")
+            if page == link:
+                continue
+            if page not in previous:
+                previous[page] = set(corpus[page])
+            change(corpus[page], link)
+    return previous
+
+
+def update_pagerank(corpus, ranks, damping_factor, added=(), removed=(),
+                    tolerance=matrix.TOLERANCE, links=None, push=False):
+    """
+    Applies link changes to `corpus` and returns its new PageRank
+    values, starting from `ranks`, its values before the change, and
+    the number of power iterations or pushes that took.
+
+    Power iteration runs on `links`, the LinkMatrix of the corpus before
+    the change, which is updated in place, or else on a new one. With
+    `push`, only pages the change reaches are updated instead, without
+    needing a matrix at all.
+    """
+    previous = apply_link_changes(corpus, added, removed)
+    if not push:
+        if links is None:
+            links = matrix.LinkMatrix(corpus)
+        else:
+            links.update(corpus, previous)
+        vector, iterations = matrix.power_iteration(links, damping_factor, tolerance,
+                                                    start=links.vector(ranks))
+        return links.ranks(vector), iterations
+
+    # Scale the old ranks to solve y = damping * links @ y + 1 for the old links
+    count = len(corpus)
+    dangling_rank = sum(ranks[page] for page in corpus if not corpus[page] and page not in previous)
+    dangling_rank += sum(ranks[page] for page, old_links in previous.items() if not old_links)
+    scale = count / (1 - damping_factor + damping_factor * dangling_rank)
+    values = {page: rank * scale for page, rank in ranks.items()}
+
+    # Moving each changed page's share from its old links to its new ones
+    residuals = {}
+    for page, old_links in previous.items():
+        for page_links, sign in [(old_links, -1), (corpus[page], 1)]:
+            for link in page_links:
+                share = sign * damping_factor * values[page] / len(page_links)
+                residuals[link] = residuals.get(link, 0) + share
+
+    threshold = tolerance * scale / count
+    queue = deque(page for page, residual in residuals.items() if abs(residual) > threshold)
+    pushes = 0
+    while queue:
+        page = queue.popleft()
+        residual = residuals.pop(page, 0)
+        if abs(residual) <= threshold:
+            continue
+        pushes += 1
+        values[page] += residual
+        page_links = corpus[page]
+        if page_links:
+            share = damping_factor * residual / len(page_links)
+            for link in page_links:
+                before = residuals.get(link, 0)
+                residuals[link] = before + share
+                if abs(before) <= threshold < abs(before + share):
+                    queue.append(link)
+
+    total = sum(values.values())
+    return {page: value / total for page, value in values.items()}, pushes
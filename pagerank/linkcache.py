@@ -0,0 +1,134 @@
+"""
+Persistent cache of a corpus's link graph and its last PageRank values.
+
+The cache is written into the corpus directory, and records the size,
+modification time and a hash of each page it was built from, together
+with the links found in it. A later crawl only re-reads pages whose size
+or modification time changed, and only re-parses those whose contents
+changed too. Ranks are cached separately, so power iteration can start
+from the previous answer rather than from equal ranks.
+
+The files are written with degrees/cachefile.py, which also lays out the
+degrees snapshot: a preamble, a JSON header that here records each
+section's dtype, then the sections as aligned little-endian arrays.
+"""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "degrees"))
+import cachefile  # noqa: E402
+
+MAGIC = b"PRCACHE\0"
+VERSION = 2
+LINKS_FILENAME = "pagerank.links"
+RANKS_FILENAME = "pagerank.ranks"
+
+
+def write_arrays(path, arrays):
+    """
+    Writes a dict of named NumPy arrays to a cache file.
+    """
+    dtypes = {name: values.dtype.str for name, values in arrays.items()}
+    sections = {name: np.ascontiguousarray(values) for name, values in arrays.items()}
+    cachefile.write_file(path, MAGIC, VERSION, {"dtypes": dtypes}, sections)
+
+
+def read_arrays(path):
+    """
+    Returns the dict of named arrays in a cache file, or None if there
+    is no cache file or it is from another version.
+    """
+    saved = cachefile.read_file(path, MAGIC, VERSION)
+    if saved is None:
+        return None
+    header, sections = saved
+    return {name: np.frombuffer(sections[name], dtype=dtype) for name, dtype in header["dtypes"].items()}
+
+
+def pack_strings(strings):
+    """
+    Returns UTF-8 offsets and bytes for a list of strings.
+    """
+    encoded = [string.encode("utf-8") for string in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype="<i8")
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+
+def unpack_strings(offsets, blob):
+    offsets, data = offsets.tolist(), blob.tobytes()
+    return [str(data[offsets[i]:offsets[i + 1]], "utf-8") for i in range(len(offsets) - 1)]
+
+
+def load_links(directory):
+    """
+    Returns a dict mapping each cached page to a tuple of its
+    modification time in nanoseconds, size, content hash and the
+    distinct links in it, or an empty dict if there is no usable cache.
+    """
+    arrays = read_arrays(os.path.join(directory, LINKS_FILENAME))
+    if arrays is None:
+        return {}
+    names = unpack_strings(arrays["name_offsets"], arrays["names"])
+    offsets, targets = arrays["link_offsets"].tolist(), arrays["links"].tolist()
+    return {
+        names[i]: (mtime, size, digest, [names[target] for target in targets[offsets[i]:offsets[i + 1]]])
+        for i, (mtime, size, digest) in enumerate(zip(
+            arrays["mtimes"].tolist(), arrays["sizes"].tolist(), arrays["hashes"].tolist()
+        ))
+    }
+
+
+def save_links(directory, entries):
+    """
+    Writes the link cache for a dict of entries like those load_links
+    returns. Page names come first in the name table, followed by any
+    other link targets.
+    """
+    names = list(entries)
+    ids = {name: i for i, name in enumerate(names)}
+    links, link_offsets = [], [0]
+    for _, _, _, page_links in entries.values():
+        for link in sorted(page_links):
+            if link not in ids:
+                ids[link] = len(names)
+                names.append(link)
+            links.append(ids[link])
+        link_offsets.append(len(links))
+
+    name_offsets, blob = pack_strings(names)
+    write_arrays(os.path.join(directory, LINKS_FILENAME), {
+        "mtimes": np.array([entry[0] for entry in entries.values()], dtype="<i8"),
+        "sizes": np.array([entry[1] for entry in entries.values()], dtype="<i8"),
+        "hashes": np.array([entry[2] for entry in entries.values()], dtype="<u8"),
+        "link_offsets": np.array(link_offsets, dtype="<i8"),
+        "links": np.array(links, dtype="<i4"),
+        "name_offsets": name_offsets,
+        "names": blob,
+    })
+
+
+def load_ranks(directory):
+    """
+    Returns the cached dict of PageRank values, or None if there is none.
+    """
+    arrays = read_arrays(os.path.join(directory, RANKS_FILENAME))
+    if arrays is None:
+        return None
+    pages = unpack_strings(arrays["name_offsets"], arrays["names"])
+    return {page: float(rank) for page, rank in zip(pages, arrays["ranks"])}
+
+
+def save_ranks(directory, ranks):
+    """
+    Writes a dict of PageRank values to the ranks cache.
+    """
+    name_offsets, blob = pack_strings(list(ranks))
+    write_arrays(os.path.join(directory, RANKS_FILENAME), {
+        "ranks": np.array(list(ranks.values()), dtype="<f8"),
+        "name_offsets": name_offsets,
+        "names": blob,
+    })
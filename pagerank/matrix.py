@@ -0,0 +1,206 @@
+"""
+Sparse-matrix PageRank.
+
+The corpus is turned into a sparse matrix whose column for each page
+spreads its rank evenly over the pages it links to. A page with no
+links is treated as linking to every page in the corpus, so rather than
+filling in its dense column, its rank is collected separately and shared
+out evenly on each iteration. Power iteration then repeats
+
+    ranks = damping * (links @ ranks + dangling rank / N) + (1 - damping) / N
+
+until the ranks change by less than a tolerance, measured as the sum of
+absolute differences.
+
+Ranks are cached in the corpus directory, and a later run starts from
+them, so re-ranking after small edits takes few iterations.
+
+Usage: python matrix.py corpus
+"""
+
+import sys
+
+import numpy as np
+from scipy import sparse
+
+import linkcache
+from pagerank import DAMPING, crawl
+
+TOLERANCE = 1e-6
+MAX_ITERATIONS = 1000
+
+
+class LinkMatrix():
+    def __init__(self, corpus):
+        self.pages = sorted(corpus)
+        self.index = {page: i for i, page in enumerate(self.pages)}
+        count = len(self.pages)
+
+        # Column i holds 1 / (links from page i) in the row of each page it links to
+        index = self.index
+        out_degrees = np.array([len(corpus[page]) for page in self.pages], dtype=np.int64)
+        sources = np.repeat(np.arange(count), out_degrees)
+        targets = np.fromiter(
+            (index[link] for page in self.pages for link in corpus[page]),
+            dtype=np.int64, count=int(out_degrees.sum())
+        )
+        weights = 1 / out_degrees[sources]
+        self.links = sparse.csr_matrix((weights, (targets, sources)), shape=(count, count))
+        self.dangling = out_degrees == 0
+
+    def update(self, corpus, previous):
+        """
+        Brings the matrix up to date with `corpus` after the links of
+        some pages changed, given a dict of their previous links, by
+        adding a sparse correction rather than rebuilding it.
+        """
+        rows, columns, weights = [], [], []
+        for page, old_links in previous.items():
+            i = self.index[page]
+            for links, sign in [(old_links, -1), (corpus[page], 1)]:
+                for link in links:
+                    rows.append(self.index[link])
+                    columns.append(i)
+                    weights.append(sign / len(links))
+            self.dangling[i] = not corpus[page]
+        count = len(self.pages)
+        correction = sparse.csr_matrix((weights, (rows, columns)), shape=(count, count))
+        self.links = self.links + correction
+        self.links.eliminate_zeros()
+
+    def vector(self, ranks):
+        """
+        Returns a dictionary of ranks as a vector in page order, giving
+        pages without a rank an equal share and rescaling to sum to 1.
+        """
+        vector = np.array([ranks.get(page, 1 / len(self.pages)) for page in self.pages])
+        return vector / vector.sum()
+
+    def ranks(self, vector):
+        """
+        Returns a dictionary mapping each page to its value in `vector`.
+        """
+        return {page: float(value) for page, value in zip(self.pages, vector)}
+
+
+def power_iteration(matrix, damping_factor, tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS,
+                    start=None):
+    """
+    Returns the PageRank vector for a LinkMatrix and the number of
+    iterations it took, starting from the `start` vector or equal ranks
+    and stopping once an iteration changes the ranks by less than
+    `tolerance` in total.
+    """
+    count = len(matrix.pages)
+    ranks = np.full(count, 1 / count) if start is None else start
+    teleport = (1 - damping_factor) / count
+    for iteration in range(1, max_iterations + 1):
+        dangling_rank = ranks[matrix.dangling].sum()
+        next_ranks = damping_factor * (matrix.links @ ranks + dangling_rank / count) + teleport
+        difference = np.abs(next_ranks - ranks).sum()
+        ranks = next_ranks
+        if difference < tolerance:
+            break
+    return ranks / ranks.sum(), iteration
+
+
+def teleport_matrix(matrix, personalizations):
+    """
+    Returns a dense array with one column per personalization, each a
+    dictionary weighting pages or a collection of pages to weight
+    equally, scaled to be a probability distribution over the pages
+    of a LinkMatrix.
+    """
+    teleports = np.zeros((len(matrix.pages), len(personalizations)))
+    for column, weights in enumerate(personalizations):
+        if not isinstance(weights, dict):
+            weights = {page: 1 for page in weights}
+        for page, weight in weights.items():
+            teleports[matrix.index[page], column] = weight
+    totals = teleports.sum(axis=0)
+    if np.any(totals <= 0):
+        raise ValueError("Every personalization needs a page with positive weight.")
+    return teleports / totals
+
+
+def personalized_pagerank(matrix, teleports, damping_factor, tolerance=TOLERANCE,
+                          max_iterations=MAX_ITERATIONS, block=32):
+    """
+    Returns one PageRank vector for each column of `teleports` as the
+    columns of a float32 array, and the most iterations any took.
+
+    Each column is the distribution the random surfer jumps to in place
+    of choosing a page at random, and rank on pages without links is
+    shared out by it too. Columns are solved `block` at a time in
+    float32, each iteration multiplying the sparse link matrix by a
+    dense block of rank vectors, so the matrix is read once per
+    iteration for all of them. Each column stops once it changes by
+    less than `tolerance` in total.
+    """
+    count, columns = teleports.shape
+    links = matrix.links.astype(np.float32)
+    results = np.empty((count, columns), dtype=np.float32)
+    most_iterations = 0
+    for start in range(0, columns, block):
+        # Columns of the block still converging
+        active = np.arange(start, min(start + block, columns))
+        jumps = np.ascontiguousarray(teleports[:, active], dtype=np.float32)
+        ranks = jumps.copy()
+        for iteration in range(1, max_iterations + 1):
+            jump_weights = damping_factor * ranks[matrix.dangling].sum(axis=0) + (1 - damping_factor)
+            next_ranks = links @ ranks
+            next_ranks *= damping_factor
+            next_ranks += jumps * jump_weights
+            ranks -= next_ranks
+            converged = np.abs(ranks).sum(axis=0) < tolerance
+            ranks = next_ranks
+            if converged.any() or iteration == max_iterations:
+                done = converged | (iteration == max_iterations)
+                results[:, active[done]] = ranks[:, done] / ranks[:, done].sum(axis=0)
+                active, jumps, ranks = active[~done], jumps[:, ~done], ranks[:, ~done]
+                if len(active) == 0:
+                    break
+        most_iterations = max(most_iterations, iteration)
+    return results, most_iterations
+
+
+def matrix_pagerank(corpus, damping_factor, tolerance=TOLERANCE, start=None):
+    """
+    Return PageRank values for each page by power iteration on a
+    sparse link matrix, warm-started from a dictionary of earlier
+    ranks if given.
+
+    Return a dictionary where keys are page names, and values are
+    their PageRank value (a value between 0 and 1). All PageRank
+    values sum to 1.
+    """
+    matrix = LinkMatrix(corpus)
+    start = None if start is None else matrix.vector(start)
+    ranks, _ = power_iteration(matrix, damping_factor, tolerance, start=start)
+    return matrix.ranks(ranks)
+
+
+def main():
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python matrix.py corpus")
+    directory = sys.argv[1]
+    corpus = crawl(directory)
+    matrix = LinkMatrix(corpus)
+
+    # Start from the ranks of the last run, if the corpus has been ranked before
+    previous = linkcache.load_ranks(directory)
+    start = None if previous is None else matrix.vector(previous)
+    ranks, iterations = power_iteration(matrix, DAMPING, start=start)
+    ranks = matrix.ranks(ranks)
+    try:
+        linkcache.save_ranks(directory, ranks)
+    except OSError:
+        pass
+
+    print(f"PageRank Results from Sparse Power Iteration ({iterations} iterations)")
+    for page, rank in sorted(ranks.items()):
+        print(f"  {page}: {rank:.4f}")
+
+
+if __name__ == "__main__":
+    main()
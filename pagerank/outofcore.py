@@ -0,0 +1,175 @@
+"""
+Out-of-core PageRank for link graphs larger than memory.
+
+A graph is a directory holding `graph.json`, with the number of pages
+and links, and three little-endian binary arrays: `sources.i4` and
+`targets.i4` with one entry per link, sorted by source page, and
+`out_degrees.i4` with the number of links from each page. Page names,
+if any, are listed one per line in `pages.txt`.
+
+Power iteration streams through the links `block` at a time, reading
+each block into the same buffers, so the links never have to fit in
+memory. The rank vectors are memory-mapped float64 files in the graph
+directory, so only the parts being read or updated need be resident.
+
+Usage: python outofcore.py [--block N] [--top N] graph
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+
+from pagerank import DAMPING
+
+TOLERANCE = 1e-6
+MAX_ITERATIONS = 1000
+BLOCK = 1 << 20
+
+
+def write_graph(directory, count, blocks, pages=None):
+    """
+    Writes a graph of `count` pages to `directory` from an iterable of
+    (sources, targets) array pairs, whose sources must not decrease
+    from one link to the next, and optionally a list of page names.
+    """
+    os.makedirs(directory, exist_ok=True)
+    out_degrees = np.zeros(count, dtype="<i4")
+    links, last_source = 0, -1
+    with open(os.path.join(directory, "sources.i4"), "wb") as sources_file, \
+            open(os.path.join(directory, "targets.i4"), "wb") as targets_file:
+        for sources, targets in blocks:
+            if len(sources) == 0:
+                continue
+            if sources[0] < last_source or np.any(np.diff(sources) < 0):
+                raise ValueError("Links must be sorted by source page.")
+            last_source = sources[-1]
+            counts = np.bincount(sources - sources[0])
+            out_degrees[sources[0]:sources[0] + len(counts)] += counts.astype("<i4")
+            sources_file.write(np.asarray(sources, dtype="<i4").tobytes())
+            targets_file.write(np.asarray(targets, dtype="<i4").tobytes())
+            links += len(sources)
+    out_degrees.tofile(os.path.join(directory, "out_degrees.i4"))
+    if pages is not None:
+        with open(os.path.join(directory, "pages.txt"), "w", encoding="utf-8") as f:
+            for page in pages:
+                f.write(page + "\n")
+    with open(os.path.join(directory, "graph.json"), "w") as f:
+        json.dump({"pages": count, "links": links}, f)
+
+
+def write_corpus(directory, corpus, block=BLOCK):
+    """
+    Writes a corpus, as returned by crawl, as a graph in `directory`.
+    """
+    pages = sorted(corpus)
+    index = {page: i for i, page in enumerate(pages)}
+
+    def blocks():
+        sources, targets = [], []
+        for i, page in enumerate(pages):
+            for link in sorted(corpus[page]):
+                sources.append(i)
+                targets.append(index[link])
+            if len(sources) >= block:
+                yield np.array(sources), np.array(targets)
+                sources, targets = [], []
+        yield np.array(sources, dtype=np.int64), np.array(targets, dtype=np.int64)
+
+    write_graph(directory, len(pages), blocks(), pages)
+
+
+def read_pages(directory):
+    """
+    Returns the page names of a graph, or None if it has none.
+    """
+    try:
+        with open(os.path.join(directory, "pages.txt"), encoding="utf-8") as f:
+            return [line.rstrip("\n") for line in f]
+    except FileNotFoundError:
+        return None
+
+
+def out_of_core_pagerank(directory, damping_factor, tolerance=TOLERANCE,
+                         max_iterations=MAX_ITERATIONS, block=BLOCK):
+    """
+    Returns the PageRank vector of the graph in `directory` as a
+    read-only memory-mapped array, and the number of iterations it
+    took, stopping once an iteration changes the ranks by less than
+    `tolerance` in total. The ranks are left in `ranks.f8`.
+
+    At most `block` links or pages are held in memory at once, besides
+    the resident parts of the memory-mapped rank vectors.
+    """
+    with open(os.path.join(directory, "graph.json")) as f:
+        graph = json.load(f)
+    count, links = graph["pages"], graph["links"]
+    out_degrees = np.memmap(os.path.join(directory, "out_degrees.i4"), dtype="<i4", mode="r",
+                            shape=(count,))
+    paths = [os.path.join(directory, "ranks.f8"), os.path.join(directory, "next.f8")]
+    ranks = np.memmap(paths[0], dtype="<f8", mode="w+", shape=(count,))
+    next_ranks = np.memmap(paths[1], dtype="<f8", mode="w+", shape=(count,))
+    for start in range(0, count, block):
+        ranks[start:start + block] = 1 / count
+
+    sources = np.empty(block, dtype="<i4")
+    targets = np.empty(block, dtype="<i4")
+    teleport = (1 - damping_factor) / count
+    with open(os.path.join(directory, "sources.i4"), "rb") as sources_file, \
+            open(os.path.join(directory, "targets.i4"), "rb") as targets_file:
+        for iteration in range(1, max_iterations + 1):
+            dangling_rank = 0.0
+            for start in range(0, count, block):
+                dangling_rank += ranks[start:start + block][out_degrees[start:start + block] == 0].sum()
+                next_ranks[start:start + block] = 0
+
+            # Each page passes its rank on evenly over its links
+            sources_file.seek(0)
+            targets_file.seek(0)
+            for start in range(0, links, block):
+                size = min(block, links - start)
+                sources_file.readinto(memoryview(sources)[:size])
+                targets_file.readinto(memoryview(targets)[:size])
+                block_sources = sources[:size]
+                np.add.at(next_ranks, targets[:size], ranks[block_sources] / out_degrees[block_sources])
+
+            difference = 0.0
+            for start in range(0, count, block):
+                updated = damping_factor * (next_ranks[start:start + block] + dangling_rank / count) + teleport
+                difference += np.abs(updated - ranks[start:start + block]).sum()
+                next_ranks[start:start + block] = updated
+            ranks, next_ranks = next_ranks, ranks
+            paths.reverse()
+            if difference < tolerance:
+                break
+
+    # Keep the final ranks as ranks.f8, dropping the other vector
+    ranks.flush()
+    del ranks, next_ranks
+    final_path = os.path.join(directory, "ranks.f8")
+    if paths[0] == final_path:
+        os.remove(paths[1])
+    else:
+        os.replace(paths[0], final_path)
+    return np.memmap(final_path, dtype="<f8", mode="r", shape=(count,)), iteration
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rank a link graph stored on disk.")
+    parser.add_argument("--block", type=int, default=BLOCK,
+                        help="most links or pages to hold in memory at once")
+    parser.add_argument("--top", type=int, default=10, help="number of pages to show")
+    parser.add_argument("graph")
+    args = parser.parse_args()
+
+    ranks, iterations = out_of_core_pagerank(args.graph, DAMPING, block=args.block)
+    pages = read_pages(args.graph)
+    print(f"PageRank Results from Out-of-Core Iteration ({iterations} iterations)")
+    top = np.argsort(-ranks)[:args.top]
+    for i in top:
+        print(f"  {pages[i] if pages else i}: {ranks[i]:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,25 @@
+import hashlib
+import io
+import multiprocessing
 import os
 import re
 import sys
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from math import inf
 
+import numpy as np
+
+import linkcache
+
 DAMPING = 0.85
 SAMPLES = 10000
+CHUNK_SIZE = 256
+LINK_PATTERN = re.compile(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
+# Fewest samples each random surfer takes, so starting pages chosen at
+# random do not outweigh where the surfers go
+MIN_WALK = 100
 
 
 def main():
@@ -22,31 +36,77 @@ def main():
         print(f"  {page}: {ranks[page]:.4f}")
 
 
-def crawl(directory):
+def crawl(directory, workers=8, processes=False, cache=True):
     """
     Parse a directory of HTML pages and check for links to other pages.
     Return a dictionary where each key is a page, and values are
     a list of all other pages in the corpus that are linked to by the page.
+
+    Files are read and parsed by a pool of `workers` threads, or
+    processes if `processes` is true, and each file's contents are
+    dropped as soon as its links are found. With `cache`, the links in
+    each file are kept in a cache file in the directory (see linkcache),
+    and a file is only read again once its size or modification time
+    changes, and only parsed again if its contents have changed.
     """
-    pages = dict()
+    files = {}
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.name.endswith(".html"):
+                stat = entry.stat()
+                files[entry.name] = (stat.st_mtime_ns, stat.st_size)
+    cached = linkcache.load_links(directory) if cache else {}
 
-    # Extract all links from HTML files
-    for filename in os.listdir(directory):
-        if not filename.endswith(".html"):
-            continue
-        with open(os.path.join(directory, filename)) as f:
-            contents = f.read()
-            links = re.findall(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"", contents)
-            pages[filename] = set(links) - {filename}
+    # Files to read, with the hash of their cached contents if any
+    stale = [filename for filename in files if cached.get(filename, (None, None))[:2] != files[filename]]
+    tasks = [
+        (os.path.join(directory, filename), cached[filename][2] if filename in cached else None)
+        for filename in stale
+    ]
+    chunks = [tasks[start:start + CHUNK_SIZE] for start in range(0, len(tasks), CHUNK_SIZE)]
+    entries = {}
+    if chunks:
+        executor = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        with executor(max(1, workers)) as pool:
+            read = (result for chunk_results in pool.map(read_links, chunks) for result in chunk_results)
+            for filename, (digest, page_links) in zip(stale, read):
+                if page_links is None:
+                    page_links = cached[filename][3]
+                entries[filename] = files[filename] + (digest, page_links)
+    entries = {filename: entries.get(filename) or cached[filename] for filename in files}
+    if cache and (stale or len(cached) != len(files)):
+        try:
+            linkcache.save_links(directory, entries)
+        except OSError:
+            # Caching is best effort, e.g. on a read-only corpus
+            pass
 
     # Only include links to other pages in the corpus
-    for filename in pages:
-        pages[filename] = set(
-            link for link in pages[filename]
-            if link in pages
-        )
+    return {
+        filename: set(link for link in entry[3] if link in entries) - {filename}
+        for filename, entry in entries.items()
+    }
+
+
+def read_links(tasks):
+    """
+    Return the content hash of each of a list of HTML files, and the
+    set of pages it links to, or None if the hash matches the known
+    hash given with its path.
+    """
+    results = []
+    for path, known_hash in tasks:
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+        if digest == known_hash:
+            results.append((digest, None))
+            continue
 
-    return pages
+        # Decode as open() would in text mode
+        contents = io.TextIOWrapper(io.BytesIO(data)).read()
+        results.append((digest, set(LINK_PATTERN.findall(contents))))
+    return results
 
 
 def transition_model(corpus, page, damping_factor):
@@ -75,7 +135,76 @@ def transition_model(corpus, page, damping_factor):
     return prob_dist
 
 
-def sample_pagerank(corpus, damping_factor, n):
+class TransitionTable():
+    """
+    The transition model for every page of a corpus, compiled once.
+
+    Pages are numbered in sorted order, and the links of page i are
+    links[offsets[i]:offsets[i] + out_degrees[i]]. The chance of moving
+    to any page at random is the same from every page that has links,
+    so it is kept as the single `teleport` term rather than per page,
+    and pages without links are marked in `dangling`.
+    """
+    def __init__(self, corpus, damping_factor):
+        self.pages = sorted(corpus)
+        self.index = {page: i for i, page in enumerate(self.pages)}
+        self.damping_factor = damping_factor
+        self.teleport = (1 - damping_factor) / len(self.pages)
+
+        self.out_degrees = np.array([len(corpus[page]) for page in self.pages], dtype=np.int64)
+        self.offsets = np.zeros(len(self.pages), dtype=np.int64)
+        np.cumsum(self.out_degrees[:-1], out=self.offsets[1:])
+        self.links = np.fromiter(
+            (self.index[link] for page in self.pages for link in sorted(corpus[page])),
+            dtype=np.int64, count=int(self.out_degrees.sum())
+        )
+        self.link_sources = np.repeat(np.arange(len(self.pages)), self.out_degrees)
+        self.dangling = self.out_degrees == 0
+
+    def page_links(self, i):
+        """
+        Return the page numbers page number `i` links to.
+        """
+        return self.links[self.offsets[i]:self.offsets[i] + self.out_degrees[i]]
+
+    def probability(self, page, next_page):
+        """
+        Return the probability of visiting `next_page` after `page`,
+        as transition_model would give it.
+        """
+        i = self.index[page]
+        if self.dangling[i]:
+            return 1 / len(self.pages)
+        linked = self.index[next_page] in self.page_links(i)
+        return self.teleport + (self.damping_factor / self.out_degrees[i] if linked else 0)
+
+    def distribution(self, page):
+        """
+        Return a probability distribution over which page to visit next,
+        given a current page, as a dictionary like transition_model's.
+        """
+        count = len(self.pages)
+        if self.dangling[self.index[page]]:
+            return {next_page: 1 / count for next_page in self.pages}
+        distribution = {next_page: self.teleport for next_page in self.pages}
+        i = self.index[page]
+        for link in self.page_links(i):
+            distribution[self.pages[link]] += self.damping_factor / self.out_degrees[i]
+        return distribution
+
+    def step(self, ranks):
+        """
+        Return the rank vector after one step of the random surfer from
+        the rank vector `ranks`, indexed by page number.
+        """
+        count = len(self.pages)
+        shares = ranks / np.maximum(self.out_degrees, 1)
+        followed = np.bincount(self.links, weights=shares[self.link_sources], minlength=count)
+        spread = ranks[self.dangling].sum() / count
+        return self.teleport * ranks.sum() + self.damping_factor * (followed + spread)
+
+
+def sample_pagerank(corpus, damping_factor, n, seed=None, walkers=1000, workers=1):
     """
     Return PageRank values for each page by sampling `n` pages
     according to transition model, starting with a page at random.
@@ -83,24 +212,95 @@ def sample_pagerank(corpus, damping_factor, n):
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
+
+    See estimate_pagerank for how the samples are drawn.
+    """
+    ranks, _ = estimate_pagerank(corpus, damping_factor, n, seed, walkers, workers)
+    return ranks
+
+
+def estimate_pagerank(corpus, damping_factor, n, seed=None, walkers=1000, workers=1, batches=16):
+    """
+    Return PageRank estimates from `n` samples, and the standard error
+    of each, as two dictionaries keyed by page name.
+
+    The samples are split into `batches` independent runs, each with its
+    own random stream spawned from `seed`, so results are repeatable and
+    do not depend on `workers`. In each run, up to `walkers` random
+    surfers start on pages at random and move in step. Runs are shared
+    out across `workers` processes, which are given the TransitionTable
+    once rather than with every run. Standard errors come from the
+    spread of the runs' estimates.
     """
-    corpus_length = len(corpus)
-    # First sample
-    previous_page_rank = defaultdict(lambda: 1/corpus_length)
-
-    # All remaining samples
-    # Choose a previous page, then add transition probabilities
-    # Loop over remaining previous pages
-    for sample in range(1, n):
-        next_page_rank = defaultdict(float)
-        for prev_page in corpus:
-            transitions = transition_model(corpus, prev_page, damping_factor)
-            assert abs(sum(transitions.values())-1) < 10**-2
-            for next_page in transitions:
-                next_page_rank[next_page] += previous_page_rank[prev_page] * transitions[next_page]
-        previous_page_rank = next_page_rank.copy()
-        assert abs(sum(previous_page_rank.values()) - 1) < 10**-2
-    return previous_page_rank
+    table = TransitionTable(corpus, damping_factor)
+    pages = table.pages
+    batches = max(1, min(batches, n))
+    streams = np.random.SeedSequence(seed).spawn(batches)
+    tasks = [
+        (n * (i + 1) // batches - n * i // batches, walkers, stream)
+        for i, stream in enumerate(streams)
+    ]
+
+    if workers <= 1:
+        counts = [visit_counts(table, *task) for task in tasks]
+    else:
+        method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+        context = multiprocessing.get_context(method)
+        with context.Pool(workers, initializer=init_sampler, initargs=(table,)) as pool:
+            counts = pool.map(sample_task, tasks)
+
+    counts = np.array(counts)
+    sizes = np.array([task[0] for task in tasks])
+    estimates = counts / sizes[:, None]
+    if batches > 1:
+        errors = estimates.std(axis=0, ddof=1) / np.sqrt(batches)
+    else:
+        errors = np.full(len(pages), inf)
+    ranks = counts.sum(axis=0) / n
+    return (
+        {page: float(ranks[i]) for i, page in enumerate(pages)},
+        {page: float(errors[i]) for i, page in enumerate(pages)},
+    )
+
+
+def visit_counts(table, n, walkers, stream):
+    """
+    Return how often each page of a TransitionTable is visited in `n`
+    samples by up to `walkers` random surfers moving in step, each
+    taking at least MIN_WALK samples, drawing from `stream`.
+    """
+    count = len(table.pages)
+    out_degrees = table.out_degrees
+    rng = np.random.default_rng(stream)
+    visits = np.zeros(count, dtype=np.int64)
+    current = rng.integers(count, size=max(1, min(walkers, n // MIN_WALK)))
+    remaining = n
+    while remaining > 0:
+        current = current[:remaining]
+        visits += np.bincount(current, minlength=count)
+        remaining -= len(current)
+
+        # Follow a link with probability `damping_factor`, unless there are none
+        follow = np.flatnonzero((rng.random(len(current)) < table.damping_factor) & (out_degrees[current] > 0))
+        next_pages = rng.integers(count, size=len(current))
+        at = current[follow]
+        choices = table.offsets[at] + (rng.random(len(follow)) * out_degrees[at]).astype(np.int64)
+        next_pages[follow] = table.links[choices]
+        current = next_pages
+    return visits
+
+
+# Transition table of a sampling worker process
+sampler_table = None
+
+
+def init_sampler(table):
+    global sampler_table
+    sampler_table = table
+
+
+def sample_task(task):
+    return visit_counts(sampler_table, *task)
 
 
 def iterate_pagerank(corpus, damping_factor):
@@ -112,31 +312,19 @@ def iterate_pagerank(corpus, damping_factor):
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
+    table = TransitionTable(corpus, damping_factor)
+
     # Set initial values to choosing a page randomly
-    corpus_length = len(corpus)
-    prev_iterated_page_rank = defaultdict(lambda: 1/corpus_length)
-    max_abs_difference = inf
-    while max_abs_difference > 0.001:
-        max_iter_diff = -inf
-        next_iterated_page_rank = defaultdict(lambda: (1 - damping_factor) / corpus_length)
-        for prev_page in corpus:
-            if not corpus[prev_page]:
-                print("hi")
-                for next_page in corpus:
-                    next_iterated_page_rank[next_page] += prev_iterated_page_rank[prev_page] * 1/len(corpus)
-            else:
-                print("hi2")
-                for next_page in corpus[prev_page]:
-                    next_iterated_page_rank[next_page] += damping_factor * prev_iterated_page_rank[prev_page]/len(corpus[prev_page])
-
-        for prev_prob, next_prob in zip(prev_iterated_page_rank.values(), next_iterated_page_rank.values()):
-            max_iter_diff = max(max_iter_diff, abs(next_prob-prev_prob))
-        max_abs_difference = min(max_abs_difference, max_iter_diff)
-
-        prev_iterated_page_rank = next_iterated_page_rank.copy()
-        assert abs(sum(prev_iterated_page_rank.values())-1) < 10**-2
-    assert abs(sum(next_iterated_page_rank.values()) - 1) < 10**-2
-    return prev_iterated_page_rank
+    ranks = np.full(len(table.pages), 1 / len(table.pages))
+    while True:
+        next_ranks = table.step(ranks)
+        max_abs_difference = np.abs(next_ranks - ranks).max()
+        ranks = next_ranks
+        if max_abs_difference <= 0.001:
+            break
+    assert abs(ranks.sum() - 1) < 10**-2
+    return {page: float(ranks[i]) for i, page in enumerate(table.pages)}
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,214 @@
+"""
+PageRank solvers with convergence reporting.
+
+Every solver works on a LinkMatrix and records, for each iteration, the
+L1 change in the ranks (the residual) and the time it took, stopping
+once the residual falls below a tolerance. Solvers are chosen by name:
+
+    power           plain power iteration, as matrix.power_iteration
+    gauss-seidel    sweeps that use each page's new rank as soon as it
+                    is known, by solving with the lower triangle of the
+                    link matrix
+    aitken          power iteration, with Aitken's delta-squared
+                    extrapolation every few iterations of each rank
+                    whose successive changes shrink at a steady ratio
+    quadratic       power iteration, with quadratic extrapolation from
+                    the last four iterates every few iterations
+
+Not every solver is faster than power iteration. Gauss-Seidel takes
+about half as many iterations, but each sweep is a separate sparse
+solve costing two or three power iterations, on top of factoring the
+lower triangle once, so on large corpora it is the slowest. Aitken's
+extrapolation helps on small corpora, but on large ones it rarely finds
+steady ratios, and takes as many iterations as power iteration.
+
+Usage: python solvers.py [--method NAME] [--tolerance T] corpus
+"""
+
+import argparse
+import time
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import splu
+
+import matrix
+from pagerank import DAMPING, crawl
+
+# Iterations between extrapolations
+EXTRAPOLATION_PERIOD = 10
+
+# Most relative difference between a rank's last two ratios of
+# successive changes for Aitken extrapolation to trust them
+RATIO_AGREEMENT = 0.01
+
+
+class Convergence():
+    def __init__(self):
+        self.residuals = []
+        self.times = []
+        self.started = time.perf_counter()
+
+    def record(self, residual):
+        """
+        Records the residual of an iteration, and the time since the last.
+        """
+        now = time.perf_counter()
+        self.residuals.append(float(residual))
+        self.times.append(now - self.started)
+        self.started = now
+
+    @property
+    def iterations(self):
+        return len(self.residuals)
+
+    @property
+    def elapsed(self):
+        return sum(self.times)
+
+
+def power_step(links, damping_factor, ranks):
+    """
+    Returns the ranks after one step of the random surfer.
+    """
+    count = len(ranks)
+    dangling_rank = ranks[links.dangling].sum()
+    return damping_factor * (links.links @ ranks + dangling_rank / count) + (1 - damping_factor) / count
+
+
+def power(links, damping_factor, ranks, tolerance, max_iterations, convergence):
+    for _ in range(max_iterations):
+        next_ranks = power_step(links, damping_factor, ranks)
+        residual = np.abs(next_ranks - ranks).sum()
+        ranks = next_ranks
+        convergence.record(residual)
+        if residual < tolerance:
+            break
+    return ranks
+
+
+def gauss_seidel(links, damping_factor, ranks, tolerance, max_iterations, convergence):
+    # Splits the links into those to the same or earlier pages and those
+    # to later pages, so each sweep is a forward substitution through the
+    # lower triangle. Rank from pages without links is spread using the
+    # previous sweep's ranks. The lower triangle is factored once, in its
+    # own order, which leaves it as it is and makes each solve a single
+    # pass like a matrix product.
+    count = len(ranks)
+    lower = (sparse.identity(count, format="csc") - damping_factor * sparse.tril(links.links, 0)).tocsc()
+    upper = damping_factor * sparse.triu(links.links, 1).tocsr()
+    sweep = splu(lower, permc_spec="NATURAL", diag_pivot_thresh=0, options={"SymmetricMode": True}).solve
+    for _ in range(max_iterations):
+        dangling_rank = ranks[links.dangling].sum()
+        next_ranks = sweep(upper @ ranks + (damping_factor * dangling_rank + 1 - damping_factor) / count)
+        next_ranks /= next_ranks.sum()
+        residual = np.abs(next_ranks - ranks).sum()
+        ranks = next_ranks
+        convergence.record(residual)
+        if residual < tolerance:
+            break
+    return ranks
+
+
+def aitken(ranks, history):
+    """
+    Returns Aitken's delta-squared extrapolation of each rank from the
+    last four iterates. Only ranks whose last two ratios of successive
+    changes agree within RATIO_AGREEMENT, and are below 1, are
+    extrapolated, as elsewhere the extrapolation can overshoot.
+    """
+    oldest, first, second, third = history[-4:]
+    older_change, previous_change, change = first - oldest, second - first, third - second
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio, previous_ratio = change / previous_change, previous_change / older_change
+    steady = (np.isfinite(ratio) & (np.abs(ratio) < 1)
+              & (np.abs(ratio - previous_ratio) < RATIO_AGREEMENT * np.abs(ratio)))
+    extrapolated = third.copy()
+    extrapolated[steady] = third[steady] + change[steady] * ratio[steady] / (1 - ratio[steady])
+    if np.any(extrapolated < 0):
+        return ranks
+    return extrapolated / extrapolated.sum()
+
+
+def quadratic(ranks, history):
+    """
+    Returns the quadratic extrapolation of the last four iterates
+    (Kamvar et al., 2003).
+    """
+    oldest, first, second, third = history[-4:]
+    differences = np.column_stack([first - oldest, second - oldest])
+    gammas = -np.linalg.lstsq(differences, third - oldest, rcond=None)[0]
+    gamma1, gamma2, gamma3 = gammas[0], gammas[1], 1
+    extrapolated = (gamma1 + gamma2 + gamma3) * first + (gamma2 + gamma3) * second + gamma3 * third
+    if np.any(extrapolated < 0) or extrapolated.sum() <= 0:
+        return ranks
+    return extrapolated / extrapolated.sum()
+
+
+def extrapolated_power(extrapolate, needed):
+    """
+    Returns a solver that runs power iteration, replacing the ranks with
+    an extrapolation from the last `needed` iterates every
+    EXTRAPOLATION_PERIOD iterations.
+    """
+    def solver(links, damping_factor, ranks, tolerance, max_iterations, convergence):
+        history = [ranks]
+        for iteration in range(1, max_iterations + 1):
+            next_ranks = power_step(links, damping_factor, ranks)
+            residual = np.abs(next_ranks - ranks).sum()
+            ranks = next_ranks
+            history = (history + [ranks])[-needed:]
+            convergence.record(residual)
+            if residual < tolerance:
+                break
+            if iteration % EXTRAPOLATION_PERIOD == 0 and len(history) == needed:
+                ranks = extrapolate(ranks, history)
+                history = [ranks]
+        return ranks
+    return solver
+
+
+SOLVERS = {
+    "power": power,
+    "gauss-seidel": gauss_seidel,
+    "aitken": extrapolated_power(aitken, 4),
+    "quadratic": extrapolated_power(quadratic, 4),
+}
+
+
+def solve(links, damping_factor, method="power", tolerance=matrix.TOLERANCE,
+          max_iterations=matrix.MAX_ITERATIONS, start=None):
+    """
+    Returns the PageRank vector of a LinkMatrix found by the named
+    solver, starting from `start` or equal ranks, and the Convergence
+    record of its iterations.
+    """
+    if method not in SOLVERS:
+        raise ValueError(f"Unknown solver '{method}'. Choose from {', '.join(SOLVERS)}.")
+    count = len(links.pages)
+    ranks = np.full(count, 1 / count) if start is None else start
+    convergence = Convergence()
+    ranks = SOLVERS[method](links, damping_factor, ranks, tolerance, max_iterations, convergence)
+    return ranks / ranks.sum(), convergence
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rank a corpus, reporting convergence.")
+    parser.add_argument("--method", choices=list(SOLVERS), default="power")
+    parser.add_argument("--tolerance", type=float, default=matrix.TOLERANCE)
+    parser.add_argument("corpus")
+    args = parser.parse_args()
+
+    links = matrix.LinkMatrix(crawl(args.corpus))
+    ranks, convergence = solve(links, DAMPING, args.method, args.tolerance)
+    print(f"{'iteration':>9}  {'L1 residual':>12}  {'time':>10}")
+    for iteration, (residual, seconds) in enumerate(zip(convergence.residuals, convergence.times), start=1):
+        print(f"{iteration:>9}  {residual:12.3e}  {1000 * seconds:8.3f}ms")
+    print(f"{convergence.iterations} iterations in {convergence.elapsed:.3f}s")
+    print(f"PageRank Results from {args.method} solver")
+    for page, rank in sorted(links.ranks(ranks).items()):
+        print(f"  {page}: {rank:.4f}")
+
+
+if __name__ == "__main__":
+    main()
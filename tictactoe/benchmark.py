@@ -0,0 +1,35 @@
+"""
+Times minimax over the full game tree, from the empty board, for the
+list board engine in tictactoe.py and the bitboard engine.
+
+Usage: python benchmark.py
+"""
+
+import time
+
+import bitboard
+import tictactoe
+
+
+def time_minimax(engine):
+    """
+    Returns the first move minimax chooses on the empty board with an
+    engine, and the seconds it took to search the whole game tree.
+    """
+    start = time.perf_counter()
+    action = engine.minimax(engine.initial_state())
+    return action, time.perf_counter() - start
+
+
+def main():
+    print("Full-tree minimax from the empty board")
+    timings = []
+    for name, engine in [("list board", tictactoe), ("bitboard", bitboard)]:
+        action, elapsed = time_minimax(engine)
+        timings.append(elapsed)
+        print(f"  {name:<12} {elapsed:8.3f}s  plays {action}")
+    print(f"  {'speedup':<12} {timings[0] / timings[1]:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Tic Tac Toe Player on bitboards
+
+A board is a pair of 9-bit integers (xs, os), one per player, where bit
+3 * row + col is set if that player has played in that cell. The same
+functions as tictactoe.py are provided, taking and returning bitboards;
+to_board and from_board convert to and from the list boards used there.
+"""
+
+import math
+
+from tictactoe import X, O, EMPTY
+
+FULL = 0b111111111
+
+# Rows, columns, then the leading and opposite diagonals
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100,
+)
+
+
+def initial_state():
+    """
+    Returns starting state of the board.
+    """
+    return (0, 0)
+
+
+def from_board(board):
+    """
+    Returns the bitboard of a list board.
+    """
+    xs = os = 0
+    for row in range(3):
+        for col in range(3):
+            if board[row][col] == X:
+                xs |= 1 << (3 * row + col)
+            elif board[row][col] == O:
+                os |= 1 << (3 * row + col)
+    return (xs, os)
+
+
+def to_board(board):
+    """
+    Returns the list board of a bitboard.
+    """
+    xs, os = board
+    return [[X if xs >> (3 * row + col) & 1 else O if os >> (3 * row + col) & 1 else EMPTY
+             for col in range(3)]
+            for row in range(3)]
+
+
+def player(board):
+    xs, os = board
+    moves_x, moves_o = bin(xs).count("1"), bin(os).count("1")
+    assert moves_o <= moves_x <= moves_o + 1
+    return X if moves_x == moves_o else O
+
+
+def actions(board):
+    free = FULL & ~(board[0] | board[1])
+    return {(cell // 3, cell % 3) for cell in range(9) if free >> cell & 1}
+
+
+def result(board, action):
+    row, col = action
+    if not (0 <= row < 3 and 0 <= col < 3):
+        raise Exception
+    bit = 1 << (3 * row + col)
+    xs, os = board
+    if (xs | os) & bit:
+        raise Exception
+    return (xs | bit, os) if player(board) == X else (xs, os | bit)
+
+
+def winner(board):
+    """
+    Return winner of the board if there is one, else None
+    """
+    xs, os = board
+    for mask in WIN_MASKS:
+        if xs & mask == mask:
+            return X
+        if os & mask == mask:
+            return O
+    return None
+
+
+def terminal(board):
+    return winner(board) is not None or board[0] | board[1] == FULL
+
+
+def utility(board):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    w = winner(board)
+    if w == X:
+        return 1
+    elif w == O:
+        return -1
+    else:
+        return 0
+
+
+def minimax(board):
+    """
+    Returns the optimal action for the current player on the board.
+    """
+    if terminal(board):
+        return None
+
+    xs, os = board
+    optimal_action = None
+    if player(board) == X:
+        v = -math.inf
+        for bit in free_bits(xs | os):
+            utility = minimiser(xs | bit, os)
+            if utility > v:
+                optimal_action, v = divmod(bit.bit_length() - 1, 3), utility
+    else:
+        v = math.inf
+        for bit in free_bits(xs | os):
+            utility = maximiser(xs, os | bit)
+            if utility < v:
+                optimal_action, v = divmod(bit.bit_length() - 1, 3), utility
+    return optimal_action
+
+
+def free_bits(taken):
+    """
+    Returns the bit of each empty cell, given the bits of the taken ones.
+    """
+    return [1 << cell for cell in range(9) if not taken >> cell & 1]
+
+
+def won(bits):
+    for mask in WIN_MASKS:
+        if bits & mask == mask:
+            return True
+    return False
+
+
+# X has just moved when O is to play, and the other way around, so only
+# the player who just moved can have won
+def minimiser(xs, os):
+    if won(xs):
+        return 1
+    if xs | os == FULL:
+        return 0
+
+    v = math.inf
+    for bit in free_bits(xs | os):
+        v = min(v, maximiser(xs, os | bit))
+    return v
+
+
+def maximiser(xs, os):
+    if won(os):
+        return -1
+    if xs | os == FULL:
+        return 0
+
+    v = -math.inf
+    for bit in free_bits(xs | os):
+        v = max(v, minimiser(xs | bit, os))
+    return v
@@ -0,0 +1,84 @@
+import unittest
+from tictactoe import X, O, EMPTY
+from bitboard import *
+
+
+class TestConversion(unittest.TestCase):
+
+    def test_from_board(self):
+        self.assertEqual((0b000001001, 0b000000100), from_board([[X, EMPTY, O], [X, EMPTY, EMPTY], [EMPTY, EMPTY, EMPTY]]))
+
+    def test_round_trip(self):
+        board = [[X, O, O], [X, EMPTY, X], [O, EMPTY, EMPTY]]
+        self.assertEqual(board, to_board(from_board(board)))
+
+
+class TestPlayer(unittest.TestCase):
+
+    def test_x_player(self):
+        self.assertEqual(X, player(from_board([[EMPTY, EMPTY, O], [X, EMPTY, EMPTY], [EMPTY, EMPTY, EMPTY]])))
+
+    def test_o_player(self):
+        self.assertEqual(O, player(from_board([[X, EMPTY, O], [X, EMPTY, EMPTY], [EMPTY, EMPTY, EMPTY]])))
+
+
+class TestAction(unittest.TestCase):
+
+    def test_actions(self):
+        self.assertEqual({(0, 1), (1, 1), (1, 2), (2, 0), (2, 1), (2, 2)}, actions(from_board([[X, EMPTY, O], [X, EMPTY, EMPTY], [EMPTY, EMPTY, EMPTY]])))
+
+
+class TestResult(unittest.TestCase):
+
+    def test_result(self):
+        self.assertEqual([[X, O, O], [X, EMPTY, EMPTY], [EMPTY, EMPTY, EMPTY]], to_board(result(from_board([[X, EMPTY, O], [X, EMPTY, EMPTY], [EMPTY, EMPTY, EMPTY]]), (0, 1))))
+
+    def test_result_taken(self):
+        with self.assertRaises(Exception):
+            result(from_board([[X, EMPTY, O], [X, EMPTY, EMPTY], [EMPTY, EMPTY, EMPTY]]), (0, 2))
+
+
+class TestWinner(unittest.TestCase):
+
+    def test_winner_o(self):
+        self.assertEqual(winner(from_board([[X, O, O], [X, O, X], [O, X, X]])), O)
+
+    def test_winner_draw(self):
+        self.assertEqual(winner(from_board([[X, O, X], [X, X, O], [O, X, O]])), EMPTY)
+
+    def test_winner_x(self):
+        self.assertEqual(winner(from_board([[EMPTY, EMPTY, EMPTY], [X, X, X], [O, O, EMPTY]])), X)
+
+
+class TestTerminal(unittest.TestCase):
+
+    def test_terminal_false(self):
+        self.assertEqual(terminal(from_board([[X, EMPTY, EMPTY], [X, EMPTY, EMPTY], [EMPTY, O, O]])), False)
+
+    def test_terminal_true(self):
+        self.assertEqual(terminal(from_board([[X, O, X], [X, X, O], [O, X, O]])), True)
+
+
+class TestUtility(unittest.TestCase):
+
+    def test_utility_x_win(self):
+        self.assertEqual(utility(from_board([[X, EMPTY, EMPTY], [X, EMPTY, EMPTY], [X, O, O]])), 1)
+
+    def test_utility_o_win(self):
+        self.assertEqual(utility(from_board([[X, O, O], [X, O, X], [O, X, X]])), -1)
+
+
+class TestMinimax(unittest.TestCase):
+
+    def test_minimax_1(self):
+        self.assertEqual(minimax(from_board([[X, EMPTY, EMPTY], [X, EMPTY, EMPTY], [EMPTY, EMPTY, O]])), (2, 0))
+
+    def test_minimax_2(self):
+        self.assertEqual(minimax(from_board([[X, EMPTY, EMPTY], [X, EMPTY, EMPTY], [O, X, O]])), (0, 2))
+
+    def test_minimax_terminal(self):
+        self.assertEqual(minimax(from_board([[X, O, X], [X, X, O], [O, X, O]])), None)
+
+
+if __name__ == '__main__':
+    unittest.main()
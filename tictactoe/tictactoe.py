@@ -52,6 +52,8 @@ def winner(board):
     scores = defaultdict(lambda: defaultdict(int))
     for row_num, row in enumerate(board):
         for col_num, tile in enumerate(row):
+            if tile == EMPTY:
+                continue
             scores[tile][row_num] += 1
             scores[tile][3 + col_num] += 1
             if row_num == col_num:
@@ -37,6 +37,9 @@ class TestWinner(unittest.TestCase):
     def test_winner_x(self):
         self.assertEqual(winner([[X, EMPTY, EMPTY], [X, EMPTY, EMPTY], [X, O, O]]), X)
 
+    def test_winner_x_beside_empty_row(self):
+        self.assertEqual(winner([[EMPTY, EMPTY, EMPTY], [X, X, X], [O, O, EMPTY]]), X)
+
 
 class TestTerminal(unittest.TestCase):
 